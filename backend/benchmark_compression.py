@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+CPU cost vs bytes saved of response compression on trade lists.
+
+Builds /api/trades/ style bodies (row and columnar formats) from generated
+trades shaped like Trade.to_dict(), encodes them the way the routes do, and
+compresses each with the gzip levels and brotli qualities that
+COMPRESS_LEVEL / COMPRESS_BROTLI_QUALITY accept. Prints compressed size,
+ratio and median compression time per setting. Needs no database:
+    python benchmark_compression.py [rows ...]
+"""
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from utils.compression import brotli, make_compressor, STREAM_CHUNK_SIZE
+from utils.serialization import dumps
+
+DEFAULT_ROWS = (1000, 10000, 50000)
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 11)
+REPEATS = 5
+
+
+def build_trades(rows, seed=1):
+    """Trades shaped like Trade.to_dict(), spread over a year of a few symbols"""
+    random.seed(seed)
+    today = date.today()
+    symbols = ['AAPL', 'MSFT', 'TSLA', 'NVDA', 'AMD', 'SPY', 'QQQ', 'META']
+    positions = [str(uuid.uuid4()) for _ in range(max(rows // 4, 1))]
+    trades = []
+    for _ in range(rows):
+        closed = random.random() < 0.7
+        shares = random.randint(1, 200)
+        buy_price = round(random.uniform(5, 500), 2)
+        sell_price = round(random.uniform(5, 500), 2) if closed else None
+        created = datetime.now() - timedelta(days=random.randint(0, 365), seconds=random.randint(0, 86400))
+        trades.append({
+            'id': str(uuid.uuid4()),
+            'date': (today - timedelta(days=random.randint(0, 365))).isoformat(),
+            'ticker_symbol': random.choice(symbols),
+            'number_of_shares': shares,
+            'price_cost_basis': round(shares * buy_price, 2),
+            'proceeds': round(shares * sell_price, 2) if closed else None,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'trading_type': random.choice(['Swing', 'Day']),
+            'win_loss': random.choice(['W', 'L']) if closed else None,
+            'status': 'CLOSED' if closed else 'OPEN',
+            'position_id': random.choice(positions),
+            'shares_remaining': 0 if closed else shares,
+            'transaction_type': 'stock',
+            'created_at': created.isoformat(),
+            'updated_at': created.isoformat()
+        })
+    return trades
+
+
+def build_bodies(rows):
+    trades = build_trades(rows)
+    pagination = {'page': 1, 'per_page': rows, 'total': rows, 'pages': 1}
+    columnar = {key: [trade[key] for trade in trades] for key in trades[0]}
+    return {
+        'rows': dumps({'success': True, 'trades': trades, 'pagination': pagination}),
+        'columnar': dumps({'success': True, 'trades': columnar, 'pagination': pagination})
+    }
+
+
+def settings():
+    """(label, encoding, config, streamed); the defaults are also run chunk by chunk, as large bodies are sent"""
+    for level in GZIP_LEVELS:
+        yield f"gzip {level}", 'gzip', {'COMPRESS_LEVEL': level}, False
+    yield "gzip 6 st", 'gzip', {'COMPRESS_LEVEL': 6}, True
+    if brotli is None:
+        return
+    for quality in BROTLI_QUALITIES:
+        yield f"br {quality}", 'br', {'COMPRESS_BROTLI_QUALITY': quality}, False
+    yield "br 4 st", 'br', {'COMPRESS_BROTLI_QUALITY': 4}, True
+
+
+def measure(body, encoding, config, streamed=False):
+    """Compressed size and median seconds to compress body"""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        compressor = make_compressor(encoding, config)
+        if streamed:
+            size = sum(len(compressor.compress(body[i:i + STREAM_CHUNK_SIZE]))
+                       for i in range(0, len(body), STREAM_CHUNK_SIZE))
+            size += len(compressor.finish())
+        else:
+            size = len(compressor.compress_all(body))
+        timings.append(time.perf_counter() - start)
+        if sum(timings) > 5:
+            # Enough to show that a setting is too slow for a response path
+            break
+    return size, statistics.median(timings)
+
+
+def run(row_counts):
+    print(f"{'body':>16} {'setting':>9} {'bytes':>11} {'ratio':>6} {'saved':>11} {'ms':>8} {'MB/s':>7} {'ms/MB saved':>11}")
+    for rows in row_counts:
+        for shape, body in build_bodies(rows).items():
+            label = f"{rows} {shape}"
+            print(f"{label:>16} {'none':>9} {len(body):>11,}")
+            for name, encoding, config, streamed in settings():
+                size, seconds = measure(body, encoding, config, streamed)
+                saved = len(body) - size
+                print(
+                    f"{'':>16} {name:>9} {size:>11,} {len(body) / size:>5.1f}x {saved:>11,} "
+                    f"{seconds * 1000:>8.1f} {len(body) / seconds / 1e6:>7.0f} {seconds * 1000 / (saved / 1e6):>11.2f}"
+                )
+        print()
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
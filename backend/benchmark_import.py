@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Statement import benchmark.
+
+Generates a Thinkorswim export of each requested size (default 10k and 20k
+trade rows over 200 symbols), imports it for a throwaway user with
+run_statement_import - parse, group, consolidate, bulk insert and commit -
+and prints the time of each import next to the time of parsing alone.
+
+Also counts the statements sent to the database during the import, and how
+many of them insert trades. On PostgreSQL trades are written with one COPY,
+which is not counted, so that should be 0; other databases get one
+executemany INSERT, sent as multi-row VALUES of 1000 rows where the driver
+supports it. The seeded rows are deleted afterwards.
+
+Needs PostgreSQL in DATABASE_URL with migrations applied:
+    python benchmark_import.py [rows ...]
+"""
+import io
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from sqlalchemy import event
+from app import app, db
+from models import User, Trade, Position, UserStats, ImportJob
+from services.import_service import run_statement_import
+from services.statement_parsers import parse_thinkorswim_statement
+
+DEFAULT_ROWS = (10000, 20000)
+SYMBOL_COUNT = 200
+REPEATS = 3
+
+
+def build_thinkorswim_export(rows, seed=1):
+    """A Thinkorswim statement with rows trades, buys and sells spread over a year and SYMBOL_COUNT symbols"""
+    random.seed(seed)
+    symbols = [f"S{i:03d}" for i in range(SYMBOL_COUNT)]
+    start = date.today() - timedelta(days=365)
+    lines = [
+        'Account Statement for 123456789', '', 'Account Trade History',
+        ',Exec Time,Spread,Side,Qty,Pos Effect,Symbol,Exp,Strike,Type,Price,Net Price,Order Type'
+    ]
+    for _ in range(rows):
+        day = start + timedelta(days=random.randint(0, 364))
+        side = random.choice(['BUY', 'BUY', 'SELL'])
+        qty = random.randint(1, 100)
+        price = f"{random.uniform(5, 500):.2f}"
+        lines.append(
+            f",{day:%m/%d/%y} 10:{random.randint(0, 59):02d}:00,STOCK,{side},"
+            f"{'+' if side == 'BUY' else '-'}{qty},TO OPEN,{random.choice(symbols)},,,STOCK,{price},{price},LMT"
+        )
+    lines += ['', 'Profits and Losses']
+    return '\n'.join(lines).encode('utf-8')
+
+
+def create_user():
+    user = User(f"import-bench-{uuid.uuid4().hex[:8]}@example.com", 'ImportBench1', is_confirmed=True)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def delete_user(user_id):
+    """Remove everything the benchmark imported"""
+    db.session.rollback()
+    for model in (Trade, Position, UserStats, ImportJob):
+        model.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    User.query.filter_by(id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def time_import(export):
+    """Seconds to import export for a new user, and the (statements, trade inserts) it sent"""
+    counts = {'statements': 0, 'trade_inserts': 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counts['statements'] += 1
+        if statement.lstrip().upper().startswith('INSERT INTO TRADES'):
+            counts['trade_inserts'] += 1
+
+    user_id = create_user()
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        start = time.perf_counter()
+        summary = run_statement_import(user_id, 'thinkorswim', io.BytesIO(export))
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        delete_user(user_id)
+    return elapsed, summary, counts
+
+
+def time_parse(export):
+    start = time.perf_counter()
+    rows = sum(1 for _ in parse_thinkorswim_statement(io.BytesIO(export)))
+    return time.perf_counter() - start, rows
+
+
+def run(row_counts):
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("Import benchmark requires PostgreSQL (set DATABASE_URL)")
+            return False
+        for rows in row_counts:
+            export = build_thinkorswim_export(rows)
+            parse_seconds = statistics.median(time_parse(export)[0] for _ in range(REPEATS))
+            results = [time_import(export) for _ in range(REPEATS)]
+            import_seconds = statistics.median(elapsed for elapsed, _, _ in results)
+            _, summary, counts = results[-1]
+            print(
+                f"{rows:>7,} rows: import {import_seconds * 1000:7.0f} ms (parse alone {parse_seconds * 1000:5.0f} ms), "
+                f"{summary['trades_added']} trades for {len(summary['symbols'])} symbols, "
+                f"{counts['statements']} statements, {counts['trade_inserts']} trade INSERTs"
+            )
+    return True
+
+
+if __name__ == "__main__":
+    success = run([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
+    sys.exit(0 if success else 1)
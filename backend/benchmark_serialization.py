@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Trade list serialization benchmark, before and after column-tuple encoding.
+
+Seeds a throwaway user with the requested number of trades (default 50k),
+then times building the /api/trades/ body for all of them three ways:
+
+    before   ORM objects, Trade.to_dict() and jsonify
+    after    select_rows(TRADE_COLUMNS) and dumps() with orjson
+    stdlib   the same with the standard library json (orjson not installed)
+
+Each is timed from query to encoded bytes, and the bodies are checked to
+decode to the same trades. The seeded rows are deleted afterwards.
+
+Uses the database in DATABASE_URL with migrations applied:
+    python benchmark_serialization.py [rows ...]
+"""
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from flask import jsonify
+from sqlalchemy import insert
+from app import app, db
+from models import User, Trade
+import utils.serialization as serialization
+from utils.serialization import TRADE_COLUMNS, select_rows, dumps
+
+DEFAULT_ROWS = (50000,)
+REPEATS = 5
+BATCH_SIZE = 5000
+
+
+def seed_trades(user_id, rows, seed=1):
+    """Insert rows trades for user_id, spread over a year of a few symbols, open and closed"""
+    random.seed(seed)
+    today = date.today()
+    now = datetime.utcnow()
+    symbols = ['AAPL', 'MSFT', 'TSLA', 'NVDA', 'AMD', 'SPY', 'QQQ', 'META']
+    for start in range(0, rows, BATCH_SIZE):
+        batch = []
+        for _ in range(min(BATCH_SIZE, rows - start)):
+            closed = random.random() < 0.7
+            row = Trade.column_values(
+                date=today - timedelta(days=random.randint(0, 365)),
+                ticker_symbol=random.choice(symbols),
+                number_of_shares=random.randint(1, 200),
+                buy_price=round(random.uniform(5, 500), 2),
+                sell_price=round(random.uniform(5, 500), 2) if closed else None,
+                trading_type=random.choice(['Swing', 'Day']),
+                user_id=user_id,
+                status='CLOSED' if closed else 'OPEN'
+            )
+            row.update(id=str(uuid.uuid4()), created_at=now, updated_at=now)
+            batch.append(row)
+        db.session.execute(insert(Trade.__table__), batch)
+    db.session.commit()
+
+
+def create_user():
+    user = User(f"serialization-bench-{uuid.uuid4().hex[:8]}@example.com", 'SerialBench1', is_confirmed=True)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def delete_user(user_id):
+    """Remove everything the benchmark seeded"""
+    db.session.rollback()
+    Trade.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    User.query.filter_by(id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def measure(build):
+    """Median seconds of build() over REPEATS runs, each with an empty session, and its last output"""
+    timings = []
+    for _ in range(REPEATS):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        body = build()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), body
+
+
+def run(row_counts):
+    with app.app_context():
+        print(f"Database: {db.engine.dialect.name}, orjson {'installed' if serialization.orjson else 'missing'}")
+        for rows in row_counts:
+            user_id = create_user()
+            try:
+                seed_trades(user_id, rows)
+                query = Trade.query.filter(Trade.user_id == user_id)\
+                    .order_by(Trade.status.desc(), Trade.date.desc(), Trade.id)
+
+                before_seconds, before = measure(lambda: jsonify({'trades': [trade.to_dict() for trade in query]}).data)
+                after_seconds, after = measure(lambda: dumps({'trades': select_rows(query, TRADE_COLUMNS)}))
+                orjson = serialization.orjson
+                serialization.orjson = None
+                try:
+                    stdlib_seconds, stdlib = measure(lambda: dumps({'trades': select_rows(query, TRADE_COLUMNS)}))
+                finally:
+                    serialization.orjson = orjson
+
+                identical = json.loads(before) == json.loads(after) == json.loads(stdlib)
+                print(f"{rows:,} trades, {len(after) / 1e6:.1f} MB, bodies identical: {identical}")
+                for label, seconds in (('before', before_seconds), ('after', after_seconds), ('stdlib', stdlib_seconds)):
+                    print(f"  {label:7s} {seconds * 1000:8.0f} ms  {before_seconds / seconds:5.1f}x")
+            finally:
+                delete_user(user_id)
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Cold start time and per-worker memory of the backend.
+
+Cold start: imports app in a fresh interpreter several times and reports
+the median time to import it and answer /api/health, the process RSS, and
+whether heavy modules (openai, alembic) were loaded on the way.
+
+Workers: starts gunicorn with gunicorn.conf.py on a free port, with app
+preloading on and off, warms every worker with a few requests, and reports
+the time until the server answered plus RSS, PSS and USS (private memory)
+per worker, read from /proc (Linux only). With preloading, PSS and USS
+show how much of each worker is shared with the master.
+
+Uses the database in DATABASE_URL (only /api/health and a failed login are
+requested):
+    python benchmark_startup.py [workers]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_WORKERS = 4
+COLD_STARTS = 5
+WARMUP_REQUESTS = 40
+READY_TIMEOUT = 60
+
+COLD_START_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from app import app
+app.test_client().get('/api/health')
+elapsed = time.perf_counter() - start
+rss = int(open('/proc/self/status').read().split('VmRSS:')[1].split()[0]) // 1024
+print(elapsed, rss, 'openai' in sys.modules, 'alembic' in sys.modules)
+"""
+
+
+def cold_start():
+    """Median seconds to import the app and serve one request in a new interpreter, and the last run's RSS"""
+    runs = []
+    for _ in range(COLD_STARTS):
+        output = subprocess.check_output([sys.executable, '-c', COLD_START_SCRIPT], text=True)
+        elapsed, rss, openai_loaded, alembic_loaded = output.split()[-4:]
+        runs.append((float(elapsed), int(rss), openai_loaded, alembic_loaded))
+    seconds = statistics.median(run[0] for run in runs)
+    _, rss, openai_loaded, alembic_loaded = runs[-1]
+    print(f"cold start {seconds * 1000:.0f} ms, RSS {rss} MB, openai loaded {openai_loaded}, alembic loaded {alembic_loaded}")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _request(url, data=None):
+    headers = {'Content-Type': 'application/json'} if data else {}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _memory_mb(pid):
+    """RSS, PSS and USS of a process in MB, from /proc/<pid>/smaps_rollup"""
+    values = {'Rss': 0, 'Pss': 0, 'Private_Clean': 0, 'Private_Dirty': 0}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in values:
+                values[name] = int(rest.split()[0])
+    return values['Rss'] // 1024, values['Pss'] // 1024, (values['Private_Clean'] + values['Private_Dirty']) // 1024
+
+
+def _children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def gunicorn_workers(workers, preload):
+    """Start gunicorn, wait until it answers, warm the workers and print their memory"""
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_PRELOAD='true' if preload else 'false')
+    base = f'http://127.0.0.1:{port}'
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                _request(f'{base}/api/health')
+                break
+            except OSError:
+                if server.poll() is not None or time.perf_counter() - start > READY_TIMEOUT:
+                    print(f"preload={preload}: gunicorn did not start")
+                    return
+                time.sleep(0.05)
+        ready = time.perf_counter() - start
+
+        login = b'{"email": "startup-bench@example.com", "password": "not-the-password"}'
+        for _ in range(WARMUP_REQUESTS):
+            _request(f'{base}/api/health')
+            _request(f'{base}/api/auth/login', login)
+        # Let workers that started late finish booting
+        time.sleep(1)
+
+        print(f"preload={preload}: {workers} workers, answering after {ready * 1000:.0f} ms")
+        totals = [0, 0, 0]
+        for pid in _children(server.pid):
+            rss, pss, uss = _memory_mb(pid)
+            totals = [total + value for total, value in zip(totals, (rss, pss, uss))]
+            print(f"  worker {pid}: RSS {rss} MB, PSS {pss} MB, USS {uss} MB")
+        rss, pss, uss = _memory_mb(server.pid)
+        print(f"  master: RSS {rss} MB, PSS {pss} MB, USS {uss} MB")
+        print(f"  workers total: PSS {totals[1]} MB, USS {totals[2]} MB")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(workers=DEFAULT_WORKERS):
+    cold_start()
+    for preload in (True, False):
+        gunicorn_workers(workers, preload)
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Peak memory check for the streaming statement parsers.
+
+Writes a synthetic Thinkorswim and Robinhood export of the requested size
+(default 100 MB each) to a temporary directory, then iterates each parser
+over it in a fresh child process, the way an upload is read: through a
+werkzeug FileStorage. Reports the child's peak RSS growth while parsing
+and exits non-zero when it exceeds the limit, since a parser that holds
+the file (or a list of its rows) in memory grows with the file size.
+
+Needs no database:
+    python check_parser_memory.py [size_mb] [limit_mb]
+"""
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+from datetime import date, timedelta
+from werkzeug.datastructures import FileStorage
+from services.statement_parsers import parse_thinkorswim_statement, parse_robinhood_statement
+
+DEFAULT_SIZE_MB = 100
+DEFAULT_LIMIT_MB = 20
+SYMBOLS = ['AAPL', 'MSFT', 'TSLA', 'NVDA', 'AMD', 'SPY', 'QQQ', 'META']
+
+THINKORSWIM_HEADERS = [
+    '', 'Exec Time', 'Spread', 'Side', 'Qty', 'Pos Effect', 'Symbol', 'Exp',
+    'Strike', 'Type', 'Price', 'Net Price', 'Order Type'
+]
+ROBINHOOD_HEADERS = [
+    'Activity Date', 'Process Date', 'Settle Date', 'Instrument', 'Description',
+    'Trans Code', 'Quantity', 'Price', 'Amount'
+]
+
+
+def _trade_days():
+    start = date.today() - timedelta(days=5 * 365)
+    return [start + timedelta(days=i) for i in range(5 * 365)]
+
+
+def write_thinkorswim(path, size):
+    """A multi-year Thinkorswim export with one Account Trade History section of about size bytes"""
+    days = _trade_days()
+    with open(path, 'w', newline='') as f:
+        f.write('Account Statement for 123456789\n\nAccount Trade History\n')
+        f.write(','.join(THINKORSWIM_HEADERS) + '\n')
+        while f.tell() < size:
+            day = random.choice(days)
+            side = random.choice(['BUY', 'SELL'])
+            qty = random.randint(1, 500)
+            price = f"{random.uniform(5, 500):.2f}"
+            f.write(
+                f",{day:%m/%d/%y} {random.randint(9, 15):02d}:{random.randint(0, 59):02d}:00,STOCK,{side},"
+                f"{'+' if side == 'BUY' else '-'}{qty},TO OPEN,{random.choice(SYMBOLS)},,,STOCK,{price},{price},LMT\n"
+            )
+        f.write('\nProfits and Losses\n')
+
+
+def write_robinhood(path, size):
+    """A multi-year Robinhood activity export of about size bytes"""
+    days = _trade_days()
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(ROBINHOOD_HEADERS) + '\n')
+        while f.tell() < size:
+            day = random.choice(days)
+            code = random.choice(['Buy', 'Sell', 'Buy', 'Sell', 'CDIV'])
+            qty = random.randint(1, 500)
+            price = random.uniform(5, 500)
+            f.write(
+                f"{day:%m/%d/%Y},{day:%m/%d/%Y},{day:%m/%d/%Y},{random.choice(SYMBOLS)},"
+                f"\"Synthetic Corp, Common Stock\",{code},{qty},${price:,.2f},\"${qty * price:,.2f}\"\n"
+            )
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _parse_in_child(parser, path, results):
+    before = _peak_rss_mb()
+    rows = 0
+    with open(path, 'rb') as f:
+        for _ in parser(FileStorage(stream=f, filename=os.path.basename(path))):
+            rows += 1
+    results.put((rows, before, _peak_rss_mb()))
+
+
+def measure(parser, path):
+    """Rows parsed and peak RSS growth (MB) of iterating parser over the file in a fresh process"""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    child = context.Process(target=_parse_in_child, args=(parser, path, results))
+    child.start()
+    rows, before, after = results.get()
+    child.join()
+    return rows, after - before
+
+
+def run_check(size_mb=DEFAULT_SIZE_MB, limit_mb=DEFAULT_LIMIT_MB):
+    random.seed(1)
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        for name, write, parser in (
+            ('thinkorswim', write_thinkorswim, parse_thinkorswim_statement),
+            ('robinhood', write_robinhood, parse_robinhood_statement)
+        ):
+            path = os.path.join(directory, f"{name}.csv")
+            write(path, size_mb * 1024 * 1024)
+            file_mb = os.path.getsize(path) / 1024 / 1024
+            rows, growth = measure(parser, path)
+            status = 'ok' if growth <= limit_mb else 'FAIL'
+            print(f"{name:12s} {file_mb:6.1f} MB file, {rows:>9,} trades parsed, peak RSS +{growth:5.1f} MB  {status}")
+            ok = ok and growth <= limit_mb
+    if not ok:
+        print(f"\nA parser grew by more than {limit_mb} MB; it is holding the statement in memory")
+    return ok
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    success = run_check(*args)
+    sys.exit(0 if success else 1)
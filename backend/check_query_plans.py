@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the hot read routes.
+
+Seeds a throwaway user, calls each route through the test client while
+recording the SELECT statements it issues, then runs EXPLAIN on every
+statement with sequential scans disabled. With enable_seqscan off the
+planner only picks a Seq Scan when no index can serve the query, so any
+Seq Scan on a hot table means a route has lost its index. Exits non-zero
+when that happens. The seeded rows are deleted afterwards.
+
+Requires PostgreSQL with migrations applied:
+    python check_query_plans.py
+"""
+import json
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+from sqlalchemy import event
+from app import app, db
+from models import User, Trade, Position, JournalEntry, AIInsights, UserStats, ImportJob
+from services.stats_service import rebuild_user_stats
+from utils.auth_utils import generate_jwt_token
+
+# Tables whose per-user reads must always be index-backed
+HOT_TABLES = ('trades', 'positions', 'journal_entries', 'ai_insights', 'user_stats', 'users', 'import_jobs')
+
+SEED_POSITIONS = 200
+SEED_TRADES = 2000
+SEED_JOURNAL_ENTRIES = 500
+
+
+def seed_user():
+    """Create a user with enough history for the planner to consider indexes"""
+    user = User(f"plan-check-{uuid.uuid4().hex[:8]}@example.com", 'PlanCheck1', is_confirmed=True)
+    db.session.add(user)
+    db.session.flush()
+
+    today = date.today()
+    symbols = ['AAPL', 'MSFT', 'TSLA', 'NVDA', 'AMD', 'SPY']
+    positions = []
+    for i in range(SEED_POSITIONS):
+        position = Position(
+            user_id=user.id,
+            symbol=random.choice(symbols),
+            total_shares=10,
+            buy_price=random.uniform(10, 100),
+            buy_date=today - timedelta(days=random.randint(0, 365))
+        )
+        if i % 4:
+            position.close_position(random.uniform(10, 100), today)
+        positions.append(position)
+    db.session.add_all(positions)
+    db.session.flush()
+
+    trades = []
+    for i in range(SEED_TRADES):
+        position = positions[i % SEED_POSITIONS]
+        closed = position.status == 'CLOSED'
+        trades.append(Trade(
+            date=today - timedelta(days=random.randint(0, 365)),
+            ticker_symbol=position.symbol,
+            number_of_shares=random.randint(1, 50),
+            buy_price=random.uniform(10, 100),
+            sell_price=random.uniform(10, 100) if closed else None,
+            trading_type=random.choice(['Swing', 'Day']),
+            user_id=user.id,
+            status=position.status,
+            position_id=position.id
+        ))
+    db.session.add_all(trades)
+    db.session.flush()
+
+    for i in range(SEED_JOURNAL_ENTRIES):
+        db.session.add(JournalEntry(
+            date=today - timedelta(days=i % 365),
+            notes=f"Plan check entry {i}",
+            user_id=user.id,
+            trade_id=trades[i].id if i % 3 == 0 else None
+        ))
+    db.session.add(AIInsights(user_id=user.id, insights_data=json.dumps({'summary': 'plan check'})))
+
+    rebuild_user_stats(user.id)
+    db.session.commit()
+    return user, positions[0], trades[0]
+
+
+def delete_user(user_id):
+    """Remove everything seeded for the plan check user"""
+    db.session.rollback()
+    for model in (JournalEntry, AIInsights, Trade, Position, UserStats, ImportJob):
+        model.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    User.query.filter_by(id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def capture_route_queries(token, paths):
+    """Call each path and return (path, statement, parameters) for every SELECT it ran"""
+    captured = []
+    current = {}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((current['path'], statement, parameters))
+
+    client = app.test_client()
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for path in paths:
+            current['path'] = path
+            response = client.get(path, headers={'Authorization': f'Bearer {token}'})
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return captured
+
+
+def find_seq_scans(plan, found=None):
+    """Collect relations read with a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan tree"""
+    if found is None:
+        found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        find_seq_scans(child, found)
+    return found
+
+
+def check_plans(queries):
+    """EXPLAIN each captured statement with seq scans disabled; return the failures"""
+    failures = []
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('ANALYZE')
+        cursor.execute('SET enable_seqscan = off')
+        seen = set()
+        for path, statement, parameters in queries:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = [relation for relation in find_seq_scans(plan[0]['Plan']) if relation in HOT_TABLES]
+            status = 'FAIL' if scans else 'ok'
+            print(f"[{status}] {path}: {' '.join(statement.split())[:120]}")
+            if scans:
+                failures.append((path, statement, scans))
+        cursor.execute('RESET enable_seqscan')
+    finally:
+        connection.close()
+    return failures
+
+
+def run_check():
+    """Seed, capture, explain and clean up; returns True when every hot query uses an index"""
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("Query plan check requires PostgreSQL (set DATABASE_URL)")
+            return False
+
+        random.seed(0)
+        user, position, trade = seed_user()
+        user_id = user.id
+        try:
+            token = generate_jwt_token(user.id, user.email)
+            date_from = (date.today() - timedelta(days=30)).isoformat()
+            paths = [
+                '/api/auth/me',
+                '/api/trades/',
+                '/api/trades/?limit=50',
+                f'/api/trades/?status=CLOSED&date_from={date_from}',
+                f'/api/trades/{trade.id}',
+                '/api/trades/positions/',
+                '/api/trades/positions/?status=OPEN',
+                f'/api/trades/positions/{position.id}',
+                '/api/dashboard/stats',
+                '/api/dashboard/chart',
+                f'/api/dashboard/chart?date_from={date_from}&bucket=week',
+                '/api/dashboard/trading-type-stats',
+                '/api/dashboard/summary?trading_type=Swing',
+                '/api/journal/',
+                f'/api/journal/?trade_id={trade.id}',
+                f'/api/journal/?date_from={date_from}',
+                '/api/journal/?search=entry',
+                '/api/journal/stored-insights',
+            ]
+            queries = capture_route_queries(token, paths)
+            failures = check_plans(queries)
+        finally:
+            delete_user(user_id)
+
+    if failures:
+        print(f"\n{len(failures)} hot queries fall back to a sequential scan:")
+        for path, statement, scans in failures:
+            print(f"  {path} -> Seq Scan on {', '.join(sorted(set(scans)))}")
+            print(f"    {' '.join(statement.split())}")
+        return False
+
+    print(f"\nAll {len(queries)} captured queries are index-backed")
+    return True
+
+
+if __name__ == "__main__":
+    success = run_check()
+    sys.exit(0 if success else 1)
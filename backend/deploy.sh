@@ -18,4 +18,4 @@ flask db upgrade
 
 # Start the application
 echo "Starting Flask application..."
-python app.py 
\ No newline at end of file
+exec gunicorn -c gunicorn.conf.py app:app 
\ No newline at end of file
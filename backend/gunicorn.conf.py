@@ -0,0 +1,62 @@
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py app:app
+
+The app is loaded once in the master (preload_app) and workers are forked
+from it, so imported modules and app setup are shared copy-on-write instead
+of being rebuilt in every worker. Everything is tunable from the environment:
+
+  WEB_CONCURRENCY        worker processes (default 2)
+  GUNICORN_WORKER_CLASS  gthread (default), sync or gevent
+  GUNICORN_THREADS       threads per gthread worker (default 4)
+  GUNICORN_TIMEOUT       seconds before a silent worker is restarted (default 120)
+  GUNICORN_PRELOAD       load the app before forking (default true)
+  GUNICORN_MAX_REQUESTS  recycle a worker after this many requests (default 0, never)
+
+gthread is the default because requests mostly wait on PostgreSQL. gevent
+needs `pip install gevent` plus psycogreen to make psycopg2 cooperative; without
+it each database query blocks the whole worker. Each worker needs a database
+connection per thread (DB_POOL_SIZE + DB_MAX_OVERFLOW >= GUNICORN_THREADS),
+and WEB_CONCURRENCY times that must stay within what PostgreSQL allows.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5001)}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+# Imported in the master so every worker shares them; the app itself imports them on first use
+PRELOAD_MODULES = ('openai',)
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded, right before workers are forked"""
+    if not preload_app:
+        return
+    for module in PRELOAD_MODULES:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+    # Move everything allocated so far out of the collector's reach, so that
+    # collections in the workers do not write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Drop any database connections inherited from the master; each worker opens its own"""
+    if not preload_app:
+        return
+    from database import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
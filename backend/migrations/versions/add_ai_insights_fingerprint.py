@@ -0,0 +1,26 @@
+"""Add input fingerprint to ai_insights for memoized insights
+
+Revision ID: add_ai_insights_fingerprint
+Revises: add_journal_digests
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_ai_insights_fingerprint'
+down_revision = 'add_journal_digests'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ai_insights', sa.Column('fingerprint', sa.String(64), nullable=True))
+    op.create_index('ix_ai_insights_user_fingerprint', 'ai_insights', ['user_id', 'fingerprint'])
+
+
+def downgrade():
+    op.drop_index('ix_ai_insights_user_fingerprint', table_name='ai_insights')
+    op.drop_column('ai_insights', 'fingerprint')
@@ -0,0 +1,50 @@
+"""Add composite and partial indexes for the per-user hot paths
+
+Revision ID: add_hot_path_indexes
+Revises: add_trades_keyset_index
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_path_indexes'
+down_revision = 'add_trades_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Dashboard date windows and chart ranges: user_id + date
+    op.create_index('ix_trades_user_date', 'trades', ['user_id', 'date'])
+    # Position details and position deletes: trades of one position, newest first
+    op.create_index('ix_trades_position_date', 'trades', ['position_id', 'date'])
+
+    # Journal list (newest first) and insights input
+    op.create_index('ix_journal_entries_user_date', 'journal_entries', ['user_id', 'date'])
+    # Journal entries filtered by linked trade
+    op.create_index('ix_journal_entries_trade_id', 'journal_entries', ['trade_id'])
+
+    # Latest stored insights per user
+    op.create_index('ix_ai_insights_user_created_at', 'ai_insights', ['user_id', 'created_at'])
+
+    # Open positions are a small slice of each user's history and are read on
+    # every trades listing and statement import
+    op.create_index(
+        'ix_positions_user_open',
+        'positions',
+        ['user_id', 'symbol'],
+        postgresql_where=sa.text("status = 'OPEN'"),
+        sqlite_where=sa.text("status = 'OPEN'")
+    )
+
+
+def downgrade():
+    op.drop_index('ix_positions_user_open', table_name='positions')
+    op.drop_index('ix_ai_insights_user_created_at', table_name='ai_insights')
+    op.drop_index('ix_journal_entries_trade_id', table_name='journal_entries')
+    op.drop_index('ix_journal_entries_user_date', table_name='journal_entries')
+    op.drop_index('ix_trades_position_date', table_name='trades')
+    op.drop_index('ix_trades_user_date', table_name='trades')
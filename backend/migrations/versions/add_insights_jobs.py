@@ -0,0 +1,40 @@
+"""Add insights_jobs table for background AI insights generation
+
+Revision ID: add_insights_jobs
+Revises: add_ai_insights_fingerprint
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_insights_jobs'
+down_revision = 'add_ai_insights_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('insights_jobs',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('user_id', sa.String(36), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('insights_id', sa.String(36), nullable=True),
+        sa.Column('memoized', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['insights_id'], ['ai_insights.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_insights_jobs_user_created_at', 'insights_jobs', ['user_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_insights_jobs_user_created_at', table_name='insights_jobs')
+    op.drop_table('insights_jobs')
@@ -0,0 +1,36 @@
+"""Add journal_digests table for incremental AI insights
+
+Revision ID: add_journal_digests
+Revises: add_journal_keyset_index
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_journal_digests'
+down_revision = 'add_journal_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('journal_digests',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('user_id', sa.String(36), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_entry_updated_at', sa.DateTime(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'week_start', name='uq_journal_digests_user_week')
+    )
+
+
+def downgrade():
+    op.drop_table('journal_digests')
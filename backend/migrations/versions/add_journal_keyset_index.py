@@ -0,0 +1,28 @@
+"""Extend the journal (user_id, date) index with id for keyset pagination
+
+Revision ID: add_journal_keyset_index
+Revises: add_journal_search_vector
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_journal_keyset_index'
+down_revision = 'add_journal_search_vector'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The journal list orders by (date, id) and pages on a (date, id) cursor;
+    # with id in the index both come straight from an index scan without a sort
+    op.create_index('ix_journal_entries_user_date_id', 'journal_entries', ['user_id', 'date', 'id'])
+    op.drop_index('ix_journal_entries_user_date', table_name='journal_entries')
+
+
+def downgrade():
+    op.create_index('ix_journal_entries_user_date', 'journal_entries', ['user_id', 'date'])
+    op.drop_index('ix_journal_entries_user_date_id', table_name='journal_entries')
@@ -0,0 +1,39 @@
+"""Add full-text search vector and GIN index on journal notes
+
+Revision ID: add_journal_search_vector
+Revises: add_hot_path_indexes
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_journal_search_vector'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL only; other databases search notes with ILIKE (see services/journal_search.py)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Generated column kept in sync by PostgreSQL on every insert/update of notes.
+    # Not mapped on the model, so the ORM never writes it.
+    op.execute("""
+        ALTER TABLE journal_entries
+        ADD COLUMN notes_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(notes, ''))) STORED
+    """)
+    op.execute("CREATE INDEX ix_journal_entries_notes_tsv ON journal_entries USING gin (notes_tsv)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_journal_entries_notes_tsv")
+    op.execute("ALTER TABLE journal_entries DROP COLUMN IF EXISTS notes_tsv")
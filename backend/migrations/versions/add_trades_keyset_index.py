@@ -0,0 +1,26 @@
+"""Add composite index backing keyset pagination of trades
+
+Revision ID: add_trades_keyset_index
+Revises: add_import_jobs
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_trades_keyset_index'
+down_revision = 'add_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Matches GET /api/trades/ ordering (status, date, id) within a user, so each
+    # page is a bounded index range scan instead of a full sort of the user's trades
+    op.create_index('ix_trades_user_status_date_id', 'trades', ['user_id', 'status', 'date', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_trades_user_status_date_id', table_name='trades')
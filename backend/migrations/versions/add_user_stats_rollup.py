@@ -0,0 +1,72 @@
+"""Add user_stats rollup table
+
+Revision ID: add_user_stats_rollup
+Revises: 5937ccd68c92
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_stats_rollup'
+down_revision = '5937ccd68c92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+        sa.Column('user_id', sa.String(36), nullable=False),
+        sa.Column('trading_type', sa.String(10), nullable=False),
+        sa.Column('transaction_type', sa.String(20), nullable=False),
+        sa.Column('trade_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('open_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('closed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('win_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('loss_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('realized_pnl', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('position_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('position_win_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('position_loss_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('position_pnl', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('closed_position_pnl', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'trading_type', 'transaction_type')
+    )
+
+    # Backfill the rollup from existing data (same aggregates as `flask rebuild-user-stats`)
+    op.execute("""
+        INSERT INTO user_stats (user_id, trading_type, transaction_type, trade_count, open_count,
+                                closed_count, win_count, loss_count, realized_pnl, updated_at)
+        SELECT user_id, trading_type, COALESCE(transaction_type, 'stock'),
+               COUNT(*),
+               COUNT(*) FILTER (WHERE status = 'OPEN'),
+               COUNT(*) FILTER (WHERE status = 'CLOSED'),
+               COUNT(*) FILTER (WHERE status = 'CLOSED' AND win_loss = 'Win'),
+               COUNT(*) FILTER (WHERE status = 'CLOSED' AND win_loss = 'Loss'),
+               COALESCE(SUM(proceeds - price_cost_basis) FILTER (WHERE status = 'CLOSED'), 0),
+               now()
+        FROM trades
+        GROUP BY user_id, trading_type, COALESCE(transaction_type, 'stock')
+    """)
+    op.execute("""
+        INSERT INTO user_stats (user_id, trading_type, transaction_type, position_count,
+                                position_win_count, position_loss_count, position_pnl,
+                                closed_position_pnl, updated_at)
+        SELECT user_id, '*', '*',
+               COUNT(*),
+               COUNT(*) FILTER (WHERE pnl > 0),
+               COUNT(*) FILTER (WHERE pnl < 0),
+               COALESCE(SUM(pnl), 0),
+               COALESCE(SUM(pnl) FILTER (WHERE status = 'CLOSED'), 0),
+               now()
+        FROM positions
+        GROUP BY user_id
+    """)
+
+
+def downgrade():
+    op.drop_table('user_stats')
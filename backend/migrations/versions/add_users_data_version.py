@@ -0,0 +1,24 @@
+"""Add users.data_version, bumped on every trade, position or journal write
+
+Revision ID: add_users_data_version
+Revises: add_insights_jobs
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_users_data_version'
+down_revision = 'add_insights_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'data_version')
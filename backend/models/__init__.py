@@ -4,5 +4,9 @@ from .trade import Trade
 from .journal import JournalEntry
 from .ai_insights import AIInsights
 from .position import Position
+from .user_stats import UserStats
+from .import_job import ImportJob
+from .journal_digest import JournalDigest
+from .insights_job import InsightsJob
 
-__all__ = ['User', 'Trade', 'JournalEntry', 'AIInsights', 'Position'] 
\ No newline at end of file
+__all__ = ['User', 'Trade', 'JournalEntry', 'AIInsights', 'Position', 'UserStats', 'ImportJob', 'JournalDigest', 'InsightsJob'] 
\ No newline at end of file
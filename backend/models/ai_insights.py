@@ -8,11 +8,13 @@ class AIInsights(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     insights_data = db.Column(db.Text, nullable=False)  # JSON string of insights
+    fingerprint = db.Column(db.String(64), nullable=True)  # Hash of the journal input and prompt version
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def __init__(self, user_id, insights_data):
+    def __init__(self, user_id, insights_data, fingerprint=None):
         self.user_id = user_id
         self.insights_data = insights_data
+        self.fingerprint = fingerprint
     
     def to_dict(self):
         return {
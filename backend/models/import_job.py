@@ -0,0 +1,48 @@
+from database import db
+from datetime import datetime
+import json
+import uuid
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    platform = db.Column(db.String(20), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    file_path = db.Column(db.String(500), nullable=True)  # Staged upload, removed once processed
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'completed', 'failed'
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    trades_added = db.Column(db.Integer, nullable=True)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, nullable=True)  # JSON list of error messages
+    summary = db.Column(db.Text, nullable=True)  # JSON import summary
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, user_id, platform, filename=None, file_path=None):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.platform = platform
+        self.filename = filename
+        self.file_path = file_path
+        self.status = 'queued'
+        self.rows_processed = 0
+        self.error_count = 0
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'platform': self.platform,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_processed': self.rows_processed,
+            'trades_added': self.trades_added,
+            'error_count': self.error_count,
+            'errors': json.loads(self.errors) if self.errors else [],
+            'summary': json.loads(self.summary) if self.summary else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
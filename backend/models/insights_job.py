@@ -0,0 +1,37 @@
+from database import db
+from datetime import datetime
+import uuid
+
+class InsightsJob(db.Model):
+    __tablename__ = 'insights_jobs'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'completed', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    insights_id = db.Column(db.String(36), db.ForeignKey('ai_insights.id'), nullable=True)  # Result, once completed
+    memoized = db.Column(db.Boolean, nullable=False, default=False)  # Result reused without a model call
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, user_id):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.status = 'queued'
+        self.attempts = 0
+        self.memoized = False
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.error,
+            'insights_id': str(self.insights_id) if self.insights_id else None,
+            'memoized': self.memoized,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
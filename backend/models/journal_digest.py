@@ -0,0 +1,42 @@
+from database import db
+from datetime import datetime
+import uuid
+
+class JournalDigest(db.Model):
+    """Cached summary of one week of a user's journal entries, used to build AI insights prompts"""
+    __tablename__ = 'journal_digests'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'week_start', name='uq_journal_digests_user_week'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    week_start = db.Column(db.Date, nullable=False)  # Monday of the summarized week
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    last_entry_updated_at = db.Column(db.DateTime, nullable=True)  # Newest updated_at among the week's entries and their linked trades
+    summary = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __init__(self, user_id, week_start, summary, entry_count=0, last_entry_updated_at=None):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.week_start = week_start
+        self.summary = summary
+        self.entry_count = entry_count
+        self.last_entry_updated_at = last_entry_updated_at
+
+    def is_current(self, entry_count, last_entry_updated_at):
+        """True if the digest still describes the week's entries (nothing added, edited or deleted)"""
+        return self.entry_count == entry_count and self.last_entry_updated_at == last_entry_updated_at
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'week_start': self.week_start.isoformat(),
+            'entry_count': self.entry_count,
+            'last_entry_updated_at': self.last_entry_updated_at.isoformat() if self.last_entry_updated_at else None,
+            'summary': self.summary,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -37,26 +37,45 @@ class Trade(db.Model):
     journal_entries = db.relationship('JournalEntry', backref='trade', lazy=True)
     
     def __init__(self, date, ticker_symbol, number_of_shares, buy_price, sell_price, trading_type, user_id=None, status='CLOSED', position_id=None, shares_remaining=None, transaction_type='stock'):
-        self.date = date
-        self.ticker_symbol = ticker_symbol.upper()
-        self.number_of_shares = int(number_of_shares)
-        self.buy_price = float(buy_price) if buy_price is not None else None
-        self.sell_price = float(sell_price) if sell_price is not None else None
-        self.price_cost_basis = self.number_of_shares * self.buy_price if self.buy_price is not None else 0.0
-        self.proceeds = self.number_of_shares * self.sell_price if self.sell_price is not None else 0.0
-        self.trading_type = trading_type
-        self.user_id = user_id
-        self.status = status
-        self.position_id = position_id
-        self.shares_remaining = shares_remaining
-        self.transaction_type = transaction_type
+        values = self.column_values(date, ticker_symbol, number_of_shares, buy_price, sell_price, trading_type,
+                                    user_id, status, position_id, shares_remaining, transaction_type)
+        for name, value in values.items():
+            setattr(self, name, value)
+    
+    @staticmethod
+    def column_values(date, ticker_symbol, number_of_shares, buy_price, sell_price, trading_type, user_id=None, status='CLOSED', position_id=None, shares_remaining=None, transaction_type='stock'):
+        """Column values for a new trade, including derived cost basis, proceeds and win/loss.
+        
+        Shared by __init__ and bulk inserts that skip building ORM objects.
+        """
+        number_of_shares = int(number_of_shares)
+        buy_price = float(buy_price) if buy_price is not None else None
+        sell_price = float(sell_price) if sell_price is not None else None
+        price_cost_basis = number_of_shares * buy_price if buy_price is not None else 0.0
+        proceeds = number_of_shares * sell_price if sell_price is not None else 0.0
         
         # Auto-detect win/loss based on proceeds vs cost basis (only for closed trades)
-        if self.sell_price is not None:
-            total_cost = self.price_cost_basis
-            self.win_loss = 'Win' if self.proceeds > total_cost else 'Loss'
+        if sell_price is not None:
+            win_loss = 'Win' if proceeds > price_cost_basis else 'Loss'
         else:
-            self.win_loss = 'Pending'  # For open positions
+            win_loss = 'Pending'  # For open positions
+        
+        return {
+            'date': date,
+            'ticker_symbol': ticker_symbol.upper(),
+            'number_of_shares': number_of_shares,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'price_cost_basis': price_cost_basis,
+            'proceeds': proceeds,
+            'trading_type': trading_type,
+            'win_loss': win_loss,
+            'user_id': user_id,
+            'status': status,
+            'position_id': position_id,
+            'shares_remaining': shares_remaining,
+            'transaction_type': transaction_type
+        }
     
     def to_dict(self):
         return {
@@ -78,6 +97,20 @@ class Trade(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
     
+    def to_summary_dict(self):
+        """Compact form embedded in other resources, e.g. journal entries"""
+        return {
+            'id': str(self.id),
+            'date': self.date.isoformat(),
+            'ticker_symbol': self.ticker_symbol,
+            'number_of_shares': self.number_of_shares,
+            'trading_type': self.trading_type,
+            'transaction_type': self.transaction_type,
+            'status': self.status,
+            'win_loss': self.win_loss,
+            'profit_loss': self.calculate_profit_loss()
+        }
+    
     def calculate_profit_loss(self):
         """Calculate profit/loss for this trade"""
         if self.proceeds is None or self.price_cost_basis is None:
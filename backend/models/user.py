@@ -13,6 +13,8 @@ class User(db.Model):
     confirmation_token = db.Column(db.String(128), nullable=True)
     plan = db.Column(db.String(20), default='free')  # 'free', 'premium', 'pro'
     last_ai_insights_date = db.Column(db.DateTime, nullable=True)
+    # Bumped on every trade, position or journal write (utils/data_version.py); backs ETags
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -51,14 +53,25 @@ class User(db.Model):
         from datetime import timedelta
         return self.last_ai_insights_date + timedelta(days=7)
     
+    def insights_plan_info(self):
+        """Plan fields returned alongside AI insights"""
+        next_available = self.get_next_ai_insights_date()
+        return {
+            'plan': self.plan,
+            'can_get_insights': self.can_get_ai_insights(),
+            'last_insights_date': self.last_ai_insights_date.isoformat() if self.last_ai_insights_date else None,
+            'next_available_date': next_available.isoformat() if next_available else None
+        }
+    
     def to_dict(self):
+        next_ai_insights_date = self.get_next_ai_insights_date()
         return {
             'id': str(self.id),
             'email': self.email,
             'is_confirmed': self.is_confirmed,
             'plan': self.plan,
             'last_ai_insights_date': self.last_ai_insights_date.isoformat() if self.last_ai_insights_date else None,
-            'next_ai_insights_date': self.get_next_ai_insights_date().isoformat() if self.get_next_ai_insights_date() else None,
+            'next_ai_insights_date': next_ai_insights_date.isoformat() if next_ai_insights_date else None,
             'can_get_ai_insights': self.can_get_ai_insights(),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
@@ -0,0 +1,54 @@
+from database import db
+from datetime import datetime
+
+# Positions carry neither a trading type nor a transaction type, so their
+# counters are kept on a single row per user keyed with this marker.
+ALL_TYPES = '*'
+
+TRADE_COUNTERS = ('trade_count', 'open_count', 'closed_count', 'win_count', 'loss_count', 'realized_pnl')
+POSITION_COUNTERS = ('position_count', 'position_win_count', 'position_loss_count', 'position_pnl', 'closed_position_pnl')
+
+
+class UserStats(db.Model):
+    """Incrementally maintained statistics rollup for a user's trades and positions"""
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    trading_type = db.Column(db.String(10), primary_key=True)
+    transaction_type = db.Column(db.String(20), primary_key=True)
+
+    # Trade counters
+    trade_count = db.Column(db.Integer, nullable=False, default=0)
+    open_count = db.Column(db.Integer, nullable=False, default=0)
+    closed_count = db.Column(db.Integer, nullable=False, default=0)
+    win_count = db.Column(db.Integer, nullable=False, default=0)
+    loss_count = db.Column(db.Integer, nullable=False, default=0)
+    realized_pnl = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    # Position counters (only populated on the ALL_TYPES row)
+    position_count = db.Column(db.Integer, nullable=False, default=0)
+    position_win_count = db.Column(db.Integer, nullable=False, default=0)
+    position_loss_count = db.Column(db.Integer, nullable=False, default=0)
+    position_pnl = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    closed_position_pnl = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'user_id': str(self.user_id),
+            'trading_type': self.trading_type,
+            'transaction_type': self.transaction_type,
+            'trade_count': self.trade_count,
+            'open_count': self.open_count,
+            'closed_count': self.closed_count,
+            'win_count': self.win_count,
+            'loss_count': self.loss_count,
+            'realized_pnl': float(self.realized_pnl),
+            'position_count': self.position_count,
+            'position_win_count': self.position_win_count,
+            'position_loss_count': self.position_loss_count,
+            'position_pnl': float(self.position_pnl),
+            'closed_position_pnl': float(self.closed_position_pnl),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,140 +1,185 @@
 from flask import Blueprint, request, jsonify
 from database import db
 from models.trade import Trade
-from models.position import Position
-from utils.decorators import require_auth
+from utils.decorators import require_auth, conditional_get
+from services.stats_service import get_user_stats
+from models.import_job import ImportJob
+from services.import_service import StatementImportError, run_statement_import
+from services.import_jobs import enqueue_import_job, is_stale_import_job, fail_stale_import_jobs
+from services.statement_parsers import PARSERS
+from utils.query_utils import DATE_BUCKETS, date_bucket, format_bucket
 from sqlalchemy import func
 from datetime import datetime, timedelta
-import csv
-from io import StringIO
-from collections import defaultdict
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
-def parse_thinkorswim_statement(file):
-    """Parse Thinkorswim statement CSV file"""
-    content = file.read()
-    text = content.decode("utf-8")
-    f = StringIO(text)
-    reader = csv.reader(f)
-    lines = list(reader)
+# Closed trades on or after this many days ago count as recent in the stats
+RECENT_DAYS = 30
 
-    # Find the start of the Account Trade History section
-    trade_section = False
-    trades = []
-    for i, row in enumerate(lines):
-        if any("Account Trade History" in cell for cell in row):
-            trade_section = True
-            header_row = i + 1
-            break
-    if not trade_section:
-        return []
+# Charts for a user without trades
+EMPTY_DONUT_CHART = {'labels': [], 'data': [], 'backgroundColor': []}
+EMPTY_LINE_CHART = {'labels': [], 'data': [], 'cumulative': []}
 
-    # Parse trades
-    trade_headers = lines[header_row]
-    for row in lines[header_row+1:]:
-        if not any(row):
-            break  # End of section
-        # Skip empty or malformed rows
-        if len(row) < 12 or not row[2].strip():
-            continue
-        trade = dict(zip(trade_headers, row))
-        trades.append(trade)
+
+def recent_since():
+    """First day of the recent-trades window; it moves daily, so it is never part of the rollup"""
+    return datetime.now().date() - timedelta(days=RECENT_DAYS)
+
+
+def count_recent_trades(user, trading_type=None):
+    """Closed trades in the recent window, counted with a date-bounded query"""
+    recent_query = db.session.query(func.count(Trade.id)).filter(
+        Trade.user_id == user.id,
+        Trade.status == 'CLOSED',
+        Trade.date >= recent_since()
+    )
+    if trading_type:
+        recent_query = recent_query.filter(Trade.trading_type == trading_type)
+    return recent_query.scalar()
+
+
+def query_profit_loss_by_period(user, trading_type=None, bucket='day', date_from=None, date_to=None, count_recent=False):
+    """Closed-trade P&L per day (or week/month), grouped in the database so the result is one row per bucket
     
-    return trades
+    With count_recent each row also carries recent_count, the bucket's closed
+    trades inside the recent window, so the summary needs no separate count.
+    """
+    period = date_bucket(Trade.date, bucket).label('period')
+    columns = [period, func.sum(Trade.proceeds - Trade.price_cost_basis).label('profit_loss')]
+    if count_recent:
+        columns.append(func.count(Trade.id).filter(Trade.date >= recent_since()).label('recent_count'))
+    line_query = db.session.query(*columns).filter(
+        Trade.user_id == user.id,
+        Trade.status == 'CLOSED'
+    )
+    if trading_type:
+        line_query = line_query.filter(Trade.trading_type == trading_type)
+    if date_from:
+        line_query = line_query.filter(Trade.date >= datetime.strptime(date_from, '%Y-%m-%d').date())
+    if date_to:
+        line_query = line_query.filter(Trade.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
+    return line_query.group_by(period).order_by(period).all()
 
-def parse_robinhood_statement(file):
-    """Parse Robinhood statement CSV file"""
-    try:
-        print("Starting Robinhood CSV parsing...")
-        content = file.read()
-        print(f"Read {len(content)} bytes from file")
-        text = content.decode("utf-8")
-        print(f"Decoded text length: {len(text)}")
-        f = StringIO(text)
-        reader = csv.reader(f)
-        lines = list(reader)
-        print(f"CSV has {len(lines)} total lines")
-    except Exception as e:
-        print(f"Error reading Robinhood CSV file: {e}")
-        return []
+
+def build_stats(user_stats, trading_type, recent_trades_count):
+    """The stats block of /stats from the rollup and the recent-trades count"""
+    # Only count closed trades for P&L calculations
+    trade_totals = user_stats.trades(trading_type)
+    if not trade_totals['trade_count']:
+        return {
+            'total_trades': 0,
+            'win_count': 0,
+            'loss_count': 0,
+            'win_rate': 0,
+            'total_profit_loss': 0,
+            'avg_profit_loss': 0
+        }
     
-    trades = []
-    if len(lines) < 2:
-        print(f"Robinhood CSV has only {len(lines)} lines, need at least 2")
-        return trades
+    total_trades = trade_totals['trade_count']
+    win_count = trade_totals['win_count']
+    loss_count = trade_totals['loss_count']
+    closed_count = trade_totals['closed_count']
+    win_rate = (win_count / closed_count * 100) if closed_count > 0 else 0
     
-    # Robinhood CSV has headers in first row
-    headers = lines[0]
-    print(f"Robinhood CSV headers: {headers}")
+    # Calculate profit/loss from positions instead of individual trades
+    position_totals = user_stats.positions()
+    total_profit_loss = position_totals['position_pnl']
+    position_count = position_totals['position_count']
+    avg_profit_loss = total_profit_loss / position_count if position_count > 0 else 0
     
-    # Print first few rows for debugging
-    for i, row in enumerate(lines[1:4]):
-        print(f"Row {i+1}: {row}")
+    # Realized P&L from closed positions
+    recent_profit_loss = position_totals['closed_position_pnl']
     
-    for row in lines[1:]:
-        if len(row) < len(headers):
-            print(f"Skipping short row: {row}")
-            continue
-        
-        trade = dict(zip(headers, row))
-        
-        # Extract basic trade info using actual Robinhood column names
-        symbol = trade.get('Instrument', '').strip()
-        trans_code = trade.get('Trans Code', '').strip()
-        qty = trade.get('Quantity', '').strip()
-        price = trade.get('Price', '').strip()
-        amount = trade.get('Amount', '').strip()
-        
-        print(f"Row data: {row}")
-        print(f"Extracted: symbol='{symbol}', trans_code='{trans_code}', qty='{qty}', price='{price}', amount='{amount}'")
-        
-        # Skip non-trade rows (dividends, fees, deposits, etc.)
-        if not symbol or not trans_code or not qty or not price:
-            print(f"Skipping non-trade row: symbol='{symbol}', trans_code='{trans_code}', qty='{qty}', price='{price}'")
-            continue
-            
-        # Skip options trades for now (BTO, STO, STC)
-        if trans_code in ['BTO', 'STO', 'STC']:
-            print(f"Skipping options trade: {trans_code}")
+    return {
+        'total_trades': total_trades,
+        'win_count': win_count,
+        'loss_count': loss_count,
+        'win_rate': round(win_rate, 2),
+        'total_profit_loss': round(total_profit_loss, 2),
+        'avg_profit_loss': round(avg_profit_loss, 2),
+        'recent_profit_loss': round(recent_profit_loss, 2),
+        'recent_trades_count': recent_trades_count
+    }
+
+
+def build_donut_chart(trade_totals):
+    """Win/loss distribution of closed trades for the donut chart"""
+    win_count = trade_totals['win_count']
+    loss_count = trade_totals['loss_count']
+    
+    chart_data = {
+        'labels': [],
+        'data': [],
+        'backgroundColor': []
+    }
+    
+    # Add Win data if there are wins
+    if win_count > 0:
+        chart_data['labels'].append('Win')
+        chart_data['data'].append(win_count)
+        chart_data['backgroundColor'].append('#10B981')  # Green
+    
+    # Add Loss data if there are losses
+    if loss_count > 0:
+        chart_data['labels'].append('Loss')
+        chart_data['data'].append(loss_count)
+        chart_data['backgroundColor'].append('#EF4444')  # Red
+    
+    # If no wins or losses, add a placeholder
+    if not chart_data['labels']:
+        chart_data['labels'].append('No Data')
+        chart_data['data'].append(1)
+        chart_data['backgroundColor'].append('#6B7280')  # Gray
+    
+    return chart_data
+
+
+def build_line_chart(rows):
+    """Per-period P&L with a running total for the equity curve"""
+    daily_chart_data = {
+        'labels': [],
+        'data': [],
+        'cumulative': []
+    }
+    running_total = 0.0
+    for row in rows:
+        if row.profit_loss is None:  # Only include periods with valid P&L
             continue
-            
-        # Only process Buy/Sell stock trades
-        print(f"Checking if '{trans_code}' is in ['Buy', 'Sell']: {trans_code in ['Buy', 'Sell']}")
-        if trans_code in ['Buy', 'Sell']:
-            try:
-                # Convert to proper types
-                qty_float = abs(float(qty.replace(',', '')))
-                price_float = float(price.replace('$', '').replace(',', ''))
-                
-                # Map Robinhood format to our internal format (matching what main logic expects)
-                trade['Symbol'] = symbol
-                trade['Side'] = trans_code.upper()
-                trade['Qty'] = qty_float  # Changed from 'Quantity' to 'Qty'
-                trade['Price'] = price_float
-                trade['Transaction Type'] = 'stock'
-                
-                # Parse date
-                activity_date = trade.get('Activity Date', '')
-                if activity_date:
-                    try:
-                        # Parse MM/DD/YYYY format
-                        parsed_date = datetime.strptime(activity_date, '%m/%d/%Y')
-                        trade['Date'] = parsed_date.strftime('%m/%d/%y')
-                    except ValueError:
-                        trade['Date'] = activity_date
-                
-                trades.append(trade)
-                print(f"Added stock trade: {symbol} {trans_code} {qty_float} @ ${price_float}")
-            except (ValueError, AttributeError) as e:
-                print(f"Error processing row: {e}")
-                continue
+        profit_loss = float(row.profit_loss)
+        running_total += profit_loss
+        daily_chart_data['labels'].append(format_bucket(row.period))
+        daily_chart_data['data'].append(round(profit_loss, 2))
+        daily_chart_data['cumulative'].append(round(running_total, 2))
+    return daily_chart_data
+
+
+def build_trading_type_stats(user_stats):
+    """Swing and day stats from the position counters of the rollup"""
+    position_totals = user_stats.positions()
+    position_count = position_totals['position_count']
+    
+    # For now, we'll show the same stats for both Swing and Day since positions don't have trading_type
+    # In the future, we could add trading_type to positions or calculate it from associated trades
+    swing_stats = {
+        'total_trades': position_count,
+        'win_count': position_totals['position_win_count'],
+        'loss_count': position_totals['position_loss_count'],
+        'total_profit_loss': position_totals['position_pnl'],
+        'win_rate': 0
+    }
+    if position_count > 0:
+        swing_stats['win_rate'] = round((swing_stats['win_count'] / position_count) * 100, 2)
     
-    print(f"Total stock trades parsed: {len(trades)}")
-    return trades
+    # Same stats for Day trades for now
+    return {
+        'swing_stats': swing_stats,
+        'day_stats': swing_stats.copy()
+    }
+
 
 @dashboard_bp.route('/stats', methods=['GET'])
 @require_auth
+@conditional_get
 def get_dashboard_stats():
     """Get dashboard statistics for the authenticated user"""
     try:
@@ -143,59 +188,15 @@ def get_dashboard_stats():
         # Get query parameters
         trading_type = request.args.get('trading_type')  # 'Swing', 'Day', or None for all
         
-        # Build base query - only get trades for the current user
-        query = Trade.query.filter(Trade.user_id == user.id)
-        
-        if trading_type:
-            query = query.filter(Trade.trading_type == trading_type)
-        
-        # Get all trades for calculations
-        trades = query.all()
-        
-        if not trades:
-            return jsonify({
-                'success': True,
-                'stats': {
-                    'total_trades': 0,
-                    'win_count': 0,
-                    'loss_count': 0,
-                    'win_rate': 0,
-                    'total_profit_loss': 0,
-                    'avg_profit_loss': 0
-                }
-            }), 200
-        
-        # Calculate statistics - only count closed trades for P&L calculations
-        total_trades = len(trades)
-        closed_trades = [t for t in trades if t.status == 'CLOSED']
-        open_trades = [t for t in trades if t.status == 'OPEN']
-        
-        win_count = len([t for t in closed_trades if t.win_loss == 'Win'])
-        loss_count = len([t for t in closed_trades if t.win_loss == 'Loss'])
-        win_rate = (win_count / len(closed_trades) * 100) if len(closed_trades) > 0 else 0
-        
-        # Calculate profit/loss from positions instead of individual trades
-        positions = Position.query.filter(Position.user_id == user.id).all()
-        total_profit_loss = sum(float(pos.pnl) for pos in positions if pos.pnl is not None)
-        avg_profit_loss = total_profit_loss / len(positions) if len(positions) > 0 else 0
-        
-        # Get recent closed trades (last 30 days)
-        thirty_days_ago = datetime.now().date() - timedelta(days=30)
-        recent_closed_trades = [t for t in closed_trades if t.date >= thirty_days_ago]
-        recent_profit_loss = sum(float(pos.pnl) for pos in positions if pos.pnl is not None and pos.status == 'CLOSED')
+        # Read counters from the incrementally maintained rollup
+        user_stats = get_user_stats(user.id)
+        recent_trades_count = None
+        if user_stats.trades(trading_type)['trade_count']:
+            recent_trades_count = count_recent_trades(user, trading_type)
         
         return jsonify({
             'success': True,
-            'stats': {
-                'total_trades': total_trades,
-                'win_count': win_count,
-                'loss_count': loss_count,
-                'win_rate': round(win_rate, 2),
-                'total_profit_loss': round(total_profit_loss, 2),
-                'avg_profit_loss': round(avg_profit_loss, 2),
-                'recent_profit_loss': round(recent_profit_loss, 2),
-                'recent_trades_count': len(recent_closed_trades)
-            }
+            'stats': build_stats(user_stats, trading_type, recent_trades_count)
         }), 200
         
     except Exception as e:
@@ -207,90 +208,45 @@ def get_dashboard_stats():
 
 @dashboard_bp.route('/chart', methods=['GET'])
 @require_auth
+@conditional_get
 def get_chart_data():
-    """Get chart data for dashboard for the authenticated user"""
+    """Get chart data for dashboard for the authenticated user
+    
+    Query parameters:
+        trading_type: 'Swing' or 'Day' (all trades when omitted)
+        date_from, date_to: optional YYYY-MM-DD bounds for the line chart
+        bucket: 'day' (default), 'week' or 'month' aggregation for the line chart
+    """
     try:
         user = request.current_user
         
         # Get query parameters
         trading_type = request.args.get('trading_type')  # 'Swing', 'Day', or None for all
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        bucket = request.args.get('bucket', 'day')
         
-        # Build base query - only get trades for the current user
-        query = Trade.query.filter(Trade.user_id == user.id)
-        
-        if trading_type:
-            query = query.filter(Trade.trading_type == trading_type)
+        if bucket not in DATE_BUCKETS:
+            return jsonify({
+                'success': False,
+                'error': f'Bucket must be one of: {", ".join(DATE_BUCKETS)}'
+            }), 400
         
-        # Get all trades
-        trades = query.all()
+        # Get win/loss distribution for donut chart - only closed trades
+        trade_totals = get_user_stats(user.id).trades(trading_type)
         
-        if not trades:
+        if not trade_totals['trade_count']:
             return jsonify({
                 'success': True,
-                'donut_chart': {
-                    'labels': [],
-                    'data': [],
-                    'backgroundColor': []
-                },
-                'line_chart': {
-                    'labels': [],
-                    'data': []
-                }
+                'donut_chart': EMPTY_DONUT_CHART,
+                'line_chart': EMPTY_LINE_CHART
             }), 200
         
-        # Get win/loss distribution for donut chart - only closed trades
-        closed_trades = [t for t in trades if t.status == 'CLOSED']
-        win_count = len([t for t in closed_trades if t.win_loss == 'Win'])
-        loss_count = len([t for t in closed_trades if t.win_loss == 'Loss'])
-        
-        # Format data for donut chart
-        chart_data = {
-            'labels': [],
-            'data': [],
-            'backgroundColor': []
-        }
-        
-        # Add Win data if there are wins
-        if win_count > 0:
-            chart_data['labels'].append('Win')
-            chart_data['data'].append(win_count)
-            chart_data['backgroundColor'].append('#10B981')  # Green
-        
-        # Add Loss data if there are losses
-        if loss_count > 0:
-            chart_data['labels'].append('Loss')
-            chart_data['data'].append(loss_count)
-            chart_data['backgroundColor'].append('#EF4444')  # Red
-        
-        # If no wins or losses, add a placeholder
-        if not chart_data['labels']:
-            chart_data['labels'].append('No Data')
-            chart_data['data'].append(1)
-            chart_data['backgroundColor'].append('#6B7280')  # Gray
-        
-        # Get daily profit/loss data for line chart - only closed trades
-        daily_data = {}
-        for trade in closed_trades:
-            profit_loss = trade.calculate_profit_loss()
-            if profit_loss is not None:  # Only include trades with valid P&L
-                day = trade.date.strftime('%Y-%m-%d')
-                if day not in daily_data:
-                    daily_data[day] = 0
-                daily_data[day] += profit_loss
-        
-        # Sort by day and format for chart
-        sorted_days = sorted(daily_data.keys())
-        daily_chart_data = {
-            'labels': [],
-            'data': []
-        }
-        for day in sorted_days:
-            daily_chart_data['labels'].append(day)
-            daily_chart_data['data'].append(round(daily_data[day], 2))
+        rows = query_profit_loss_by_period(user, trading_type, bucket, date_from, date_to)
         return jsonify({
             'success': True,
-            'donut_chart': chart_data,
-            'line_chart': daily_chart_data
+            'donut_chart': build_donut_chart(trade_totals),
+            'line_chart': build_line_chart(rows)
         }), 200
         
     except Exception as e:
@@ -301,387 +257,137 @@ def get_chart_data():
 
 @dashboard_bp.route('/trading-type-stats', methods=['GET'])
 @require_auth
+@conditional_get
 def get_trading_type_stats():
     """Get statistics by trading type for the authenticated user"""
     try:
         user = request.current_user
         
-        # Get all positions for the user
-        all_positions = Position.query.filter(Position.user_id == user.id).all()
+        # Read position counters from the rollup instead of loading every position
+        return jsonify({
+            'success': True,
+            **build_trading_type_stats(get_user_stats(user.id))
+        }), 200
         
-        # For now, we'll show the same stats for both Swing and Day since positions don't have trading_type
-        # In the future, we could add trading_type to positions or calculate it from associated trades
-        swing_stats = {
-            'total_trades': len(all_positions),
-            'win_count': len([pos for pos in all_positions if pos.pnl is not None and float(pos.pnl) > 0]),
-            'loss_count': len([pos for pos in all_positions if pos.pnl is not None and float(pos.pnl) < 0]),
-            'total_profit_loss': sum(float(pos.pnl) for pos in all_positions if pos.pnl is not None),
-            'win_rate': 0
-        }
-        if len(all_positions) > 0:
-            swing_stats['win_rate'] = round((swing_stats['win_count'] / len(all_positions)) * 100, 2)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500 
+
+@dashboard_bp.route('/summary', methods=['GET'])
+@require_auth
+@conditional_get
+def get_dashboard_summary():
+    """Get /stats, /chart and /trading-type-stats in one response
+    
+    Query parameters:
+        trading_type: 'Swing' or 'Day' (all trades when omitted)
+        bucket: 'day' (default), 'week' or 'month' aggregation for the line chart
+    
+    The rollup is loaded once for all three, and the recent-trades count is
+    taken from the line chart query instead of a query of its own.
+    """
+    try:
+        user = request.current_user
         
-        # Same stats for Day trades for now
-        day_stats = swing_stats.copy()
+        trading_type = request.args.get('trading_type')  # 'Swing', 'Day', or None for all
+        bucket = request.args.get('bucket', 'day')
+        
+        if bucket not in DATE_BUCKETS:
+            return jsonify({
+                'success': False,
+                'error': f'Bucket must be one of: {", ".join(DATE_BUCKETS)}'
+            }), 400
+        
+        user_stats = get_user_stats(user.id)
+        trade_totals = user_stats.trades(trading_type)
+        
+        if trade_totals['trade_count']:
+            rows = query_profit_loss_by_period(user, trading_type, bucket, count_recent=True)
+            recent_trades_count = sum(row.recent_count for row in rows)
+            chart = {
+                'donut_chart': build_donut_chart(trade_totals),
+                'line_chart': build_line_chart(rows)
+            }
+        else:
+            recent_trades_count = None
+            chart = {
+                'donut_chart': EMPTY_DONUT_CHART,
+                'line_chart': EMPTY_LINE_CHART
+            }
         
         return jsonify({
             'success': True,
-            'swing_stats': swing_stats,
-            'day_stats': day_stats
+            'stats': build_stats(user_stats, trading_type, recent_trades_count),
+            'chart': chart,
+            'trading_type_stats': build_trading_type_stats(user_stats)
         }), 200
         
     except Exception as e:
+        print(f"Error in dashboard summary: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500 
+        }), 500
 
 @dashboard_bp.route('/upload-statement', methods=['POST'])
 @require_auth
 def upload_statement():
+    """Import a broker statement for the authenticated user
+    
+    The file is staged and imported by a background worker, so large
+    statements do not hold a request worker past the proxy timeout; the 202
+    response carries a job id to poll at /imports/<job_id>. Form field
+    async=false imports inline and returns the summary directly.
+    """
     user = request.current_user
     platform = request.form.get('platform')
     file = request.files.get('file')
     if not platform or not file:
         return jsonify({'error': 'Platform and file are required.'}), 400
-    
-    # Parse based on platform
-    if platform.lower() == "thinkorswim":
-        print("Parsing Thinkorswim statement...")
-        trades = parse_thinkorswim_statement(file)
-    elif platform.lower() == "robinhood":
-        print("Parsing Robinhood statement...")
-        trades = parse_robinhood_statement(file)
-    else:
+    if platform.lower() not in PARSERS:
         return jsonify({'error': 'Unsupported platform. Please select Thinkorswim or Robinhood.'}), 400
     
-    print(f"Parsed {len(trades)} trades from {platform} statement")
-    
-    if not trades:
-        return jsonify({'error': 'No trades found in the statement.'}), 400
-
-    # Calculate P&L and track positions
-    pnl_by_symbol: dict[str, float] = {}
-    symbol_trades = defaultdict(list)
-    new_trades = []
-    new_positions = []
-    closed_positions = []
-    
-    # Get existing open positions for this user
-    existing_positions = Position.query.filter_by(user_id=user.id, status='OPEN').all()
-    open_positions = {pos.symbol: pos for pos in existing_positions}
+    if request.form.get('async', '').lower() not in ('0', 'false', 'no'):
+        job = enqueue_import_job(user.id, platform, file)
+        return jsonify({
+            'success': True,
+            'job': job.to_dict()
+        }), 202
     
-    print(f"Processing {len(trades)} trades in main upload logic...")
-    for i, trade in enumerate(trades):
-        print(f"Trade {i}: {trade}")
-        symbol = trade.get("Symbol", "").strip()
-        side = trade.get("Side", "").strip().upper()
-        qty = trade.get("Qty", "0")
-        price = trade.get("Price", "0")
-        
-        print(f"  Extracted: symbol='{symbol}', side='{side}', qty='{qty}', price='{price}'")
-        
-        try:
-            # Handle both string and float values
-            if isinstance(qty, (int, float)):
-                qty_float = abs(float(qty))
-            else:
-                qty_str = str(qty).replace(",", "") if qty else "0"
-                qty_float = abs(float(qty_str))
-                
-            if isinstance(price, (int, float)):
-                price_float = float(price)
-            else:
-                price_str = str(price).replace(",", "") if price else "0"
-                price_float = float(price_str)
-                
-            print(f"  Converted: qty={qty_float}, price={price_float}")
-        except Exception as e:
-            print(f"  Error converting values: {e}")
-            qty_float = 0.0
-            price_float = 0.0
-            
-        if symbol:
-            if symbol not in pnl_by_symbol:
-                pnl_by_symbol[symbol] = 0.0
-            if side == "BUY":
-                pnl_by_symbol[symbol] -= qty_float * price_float
-            elif side == "SELL":
-                pnl_by_symbol[symbol] += qty_float * price_float
-            symbol_trades[symbol].append({"side": side, "qty": qty_float, "price": price_float})
-            print(f"  Added to symbol_trades: {symbol} {side} {qty_float} @ {price_float}")
-        else:
-            print(f"  Skipping trade with no symbol")
+    try:
+        summary = run_statement_import(user.id, platform, file)
+    except StatementImportError as e:
+        return jsonify({'error': str(e)}), e.status_code
     
-    print(f"Final symbol_trades: {dict(symbol_trades)}")
-    print(f"Final pnl_by_symbol: {pnl_by_symbol}")
+    return jsonify(summary)
 
-    # Process each symbol for position tracking with consolidation
-    print(f"Starting position tracking for {len(symbol_trades)} symbols...")
-    
-    # Get existing open positions for this user
-    existing_positions = Position.query.filter_by(user_id=user.id, status='OPEN').all()
-    open_positions = {pos.symbol: pos for pos in existing_positions}
-    
-    trades_added = 0
-    
-    for symbol, actions in symbol_trades.items():
-        print(f"Processing symbol {symbol} with {len(actions)} actions")
-        
-        # Separate BUY and SELL actions
-        buy_actions = []
-        sell_actions = []
-        
-        for idx, action in enumerate(actions):
-            try:
-                # Get the original trade row for additional data
-                trade_row = trades[[i for i, t in enumerate(trades) if t.get('Symbol', '').strip() == symbol][idx]]
-                
-                # Extract trade details
-                side = action['side']
-                qty = action['qty']
-                price = action['price']
-                exec_date = None
-                
-                # Parse date
-                exec_time_str = trade_row.get('Exec Time') or trade_row.get('ExecTime') or trade_row.get('Date')
-                if exec_time_str:
-                    try:
-                        exec_date = datetime.strptime(exec_time_str.split()[0], '%m/%d/%y').date()
-                    except Exception:
-                        try:
-                            exec_date = datetime.strptime(exec_time_str, '%m/%d/%y').date()
-                        except Exception:
-                            exec_date = None
-                
-                if exec_date is None:
-                    print(f"  Skipping trade due to date parsing failure: {action}")
-                    continue
-                
-                # Store action with date
-                action_data = {
-                    'side': side,
-                    'qty': qty,
-                    'price': price,
-                    'date': exec_date,
-                    'trade_row': trade_row
-                }
-                
-                if side == 'BUY':
-                    buy_actions.append(action_data)
-                elif side == 'SELL':
-                    sell_actions.append(action_data)
-                    
-            except Exception as e:
-                print(f"  Error processing trade {action}: {e}")
-                continue
-        
-        # Consolidate ALL BUY actions for this symbol (across all dates)
-        total_buy_shares = 0
-        total_buy_cost = 0.0
-        earliest_buy_date = None
-        
-        for buy_action in buy_actions:
-            total_buy_shares += buy_action['qty']
-            total_buy_cost += buy_action['qty'] * buy_action['price']
-            if earliest_buy_date is None or buy_action['date'] < earliest_buy_date:
-                earliest_buy_date = buy_action['date']
-        
-        # Consolidate ALL SELL actions for this symbol (across all dates)
-        total_sell_shares = 0
-        total_sell_cost = 0.0
-        latest_sell_date = None
-        
-        for sell_action in sell_actions:
-            total_sell_shares += sell_action['qty']
-            total_sell_cost += sell_action['qty'] * sell_action['price']
-            if latest_sell_date is None or sell_action['date'] > latest_sell_date:
-                latest_sell_date = sell_action['date']
-        
-        # Calculate weighted averages
-        buy_avg_price = total_buy_cost / total_buy_shares if total_buy_shares > 0 else 0
-        sell_avg_price = total_sell_cost / total_sell_shares if total_sell_shares > 0 else 0
-        
-        print(f"  Symbol {symbol} Summary:")
-        print(f"    Total BUY: {total_buy_shares} shares @ ${buy_avg_price:.2f} avg")
-        print(f"    Total SELL: {total_sell_shares} shares @ ${sell_avg_price:.2f} avg")
-        
-        # Handle symbols with no BUY trades (SELL-only positions)
-        if total_buy_shares == 0:
-            print(f"    Processing {symbol} - SELL-only position")
-            
-            # For SELL-only positions, use sell date as buy date and sell price as buy price
-            # This represents a "short sale" or "sold without owning" scenario
-            buy_date = latest_sell_date  # Use the sell date as buy date
-            buy_price = sell_avg_price   # Use sell price as buy price
-            remaining_shares = total_sell_shares  # Show the actual shares that were sold
-            status = 'CLOSED'           # Always closed for SELL-only
-            
-            # Calculate P&L for SELL-only positions (sell_price - buy_price = 0 since they're the same)
-            pnl = 0.0  # For SELL-only positions, P&L is 0 since buy_price = sell_price
-            
-            print(f"    SELL-only position: {total_sell_shares} shares @ ${buy_price:.2f} (sold on {buy_date})")
-            print(f"    P&L: ${pnl:.2f} (SELL-only position)")
-            
-            # Create or update position
-            position = Position.query.filter_by(user_id=user.id, symbol=symbol).first()
-            if position:
-                position.total_shares = remaining_shares
-                position.buy_price = buy_price
-                position.buy_date = buy_date
-                position.sell_price = sell_avg_price
-                position.sell_date = latest_sell_date
-                position.status = status
-                position.pnl = pnl
-                position.updated_at = datetime.utcnow()
-                print(f"    Updated existing {symbol} position")
-            else:
-                position = Position(
-                    user_id=user.id,
-                    symbol=symbol,
-                    total_shares=remaining_shares,
-                    buy_price=buy_price,
-                    buy_date=buy_date,
-                    sell_price=sell_avg_price,
-                    sell_date=latest_sell_date,
-                    status=status,
-                    pnl=pnl
-                )
-                db.session.add(position)
-                print(f"    Created new {symbol} position")
-            
-            # Create individual SELL trade records
-            for sell_action in sell_actions:
-                trade = Trade(
-                    date=sell_action['date'],
-                    ticker_symbol=symbol,
-                    number_of_shares=int(sell_action['qty']),
-                    buy_price=0,  # No actual buy price for SELL-only trades
-                    sell_price=sell_action['price'],
-                    trading_type='Swing',
-                    user_id=user.id,
-                    status='CLOSED',
-                    position_id=position.id,  # Link to the position
-                    shares_remaining=0,
-                    transaction_type='stock'
-                )
-                db.session.add(trade)
-                trades_added += 1
-                print(f"    Added SELL trade: {symbol} {sell_action['qty']} @ {sell_action['price']}")
-            
-            continue
-        
-        # Determine position status and remaining shares
-        net_shares = total_buy_shares - total_sell_shares
-        
-        if net_shares > 0:
-            # Position is still OPEN
-            status = 'OPEN'
-            remaining_shares = net_shares
-            # For open positions, calculate realized P&L from shares that were sold
-            pnl = (sell_avg_price - buy_avg_price) * total_sell_shares if total_sell_shares > 0 else 0.0
-            print(f"    Result: {remaining_shares} shares OPEN @ ${buy_avg_price:.2f}")
-            print(f"    Realized P&L: ${pnl:.2f} (from {total_sell_shares} shares sold)")
-        else:
-            # Position is CLOSED
-            status = 'CLOSED'
-            remaining_shares = 0
-            # For closed positions, P&L = (sell_price - buy_price) * shares_sold
-            pnl = (sell_avg_price - buy_avg_price) * total_sell_shares if total_sell_shares > 0 else 0.0
-            print(f"    Result: Position CLOSED (sold {total_sell_shares} of {total_buy_shares} shares)")
-            print(f"    P&L: ${pnl:.2f} (realized)")
+@dashboard_bp.route('/imports/<job_id>', methods=['GET'])
+@require_auth
+def get_import_job(job_id):
+    """Get progress and results of a background statement import"""
+    try:
+        user = request.current_user
+        job = ImportJob.query.filter_by(id=job_id, user_id=user.id).first()
         
-        # Create or update position
-        position = Position.query.filter_by(
-            user_id=user.id,
-            symbol=symbol,
-            status='OPEN'
-        ).first()
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': 'Import job not found'
+            }), 404
         
-        if position:
-            # Update existing position
-            position.total_shares = remaining_shares
-            position.buy_price = buy_avg_price
-            position.buy_date = earliest_buy_date
-            position.status = status
-            position.pnl = pnl
-            if status == 'CLOSED':
-                position.sell_price = sell_avg_price
-                position.sell_date = latest_sell_date
-            position.updated_at = datetime.utcnow()
-            print(f"  Updated {symbol} position: {remaining_shares} shares @ ${buy_avg_price:.2f} ({status})")
-        else:
-            # Create new position
-            position = Position(
-                user_id=user.id,
-                symbol=symbol,
-                total_shares=remaining_shares,
-                buy_price=buy_avg_price,
-                buy_date=earliest_buy_date,
-                status=status,
-                pnl=pnl
-            )
-            if status == 'CLOSED':
-                position.sell_price = sell_avg_price
-                position.sell_date = latest_sell_date
-            db.session.add(position)
-            print(f"  Created new {symbol} position: {remaining_shares} shares @ ${buy_avg_price:.2f} ({status})")
+        # A job whose worker died never finishes on its own
+        if is_stale_import_job(job):
+            fail_stale_import_jobs(user.id)
         
-        # Create individual trade records for audit trail
-        for buy_action in buy_actions:
-            trade = Trade(
-                date=buy_action['date'],
-                ticker_symbol=symbol,
-                number_of_shares=int(buy_action['qty']),
-                buy_price=buy_action['price'],
-                sell_price=None,
-                trading_type='Swing',
-                user_id=user.id,
-                status='OPEN' if status == 'OPEN' else 'CLOSED',
-                position_id=position.id,
-                shares_remaining=int(buy_action['qty']) if status == 'OPEN' else 0,
-                transaction_type='stock'
-            )
-            db.session.add(trade)
-            trades_added += 1
-            print(f"    Added BUY trade: {symbol} {buy_action['qty']} @ {buy_action['price']}")
+        return jsonify({
+            'success': True,
+            'job': job.to_dict()
+        }), 200
         
-        for sell_action in sell_actions:
-            trade = Trade(
-                date=sell_action['date'],
-                ticker_symbol=symbol,
-                number_of_shares=int(sell_action['qty']),
-                buy_price=buy_avg_price,  # Use position's weighted average buy price
-                sell_price=sell_action['price'],
-                trading_type='Swing',
-                user_id=user.id,
-                status='CLOSED',
-                position_id=position.id,
-                shares_remaining=0,
-                transaction_type='stock'
-            )
-            db.session.add(trade)
-            trades_added += 1
-            print(f"    Added SELL trade: {symbol} {sell_action['qty']} @ {sell_action['price']}")
-    
-    # Commit all changes
-    try:
-        db.session.commit()
-        print(f"Successfully added {trades_added} trades to database")
     except Exception as e:
-        db.session.rollback()
-        print(f"Error committing trades: {e}")
-        return jsonify({'error': 'Failed to save trades to database'}), 500
-    
-
-
-    total_pnl = float(sum(pnl_by_symbol.values()))
-
-    return jsonify({
-        "num_trades": len(trades),
-        "trades_added": trades_added,
-        "symbols": list(pnl_by_symbol.keys()),
-        "pnl_by_symbol": pnl_by_symbol,
-        "total_pnl": total_pnl,
-        "sample_trades": trades[:5]
-    }) 
\ No newline at end of file
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -3,10 +3,16 @@ from database import db
 from models.journal import JournalEntry
 from models.trade import Trade
 from models.ai_insights import AIInsights
-from utils.decorators import require_auth
+from models.insights_job import InsightsJob
+from utils.decorators import require_auth, conditional_get
+from services.journal_search import filter_by_search, fetch_search_page
+from services.insights_service import generate_insights, get_memoized_insights, insights_fingerprint
+from services.insights_jobs import enqueue_insights_job, is_stale_insights_job, fail_stale_insights_job, INSIGHTS_JOB_TIMEOUT
+from services.openai_client import get_openai_client
+from utils.query_utils import encode_cursor, decode_cursor
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import contains_eager
 from datetime import datetime
-import os
-from openai import OpenAI
 import json
 
 
@@ -16,8 +22,14 @@ journal_bp = Blueprint('journal', __name__)
 
 @journal_bp.route('/', methods=['GET'])
 @require_auth
+@conditional_get
 def get_journal_entries():
-    """Get all journal entries for the authenticated user with optional filtering and pagination"""
+    """Get all journal entries for the authenticated user with optional filtering and pagination
+    
+    Pages by page/per_page, or by cursor (pagination.next_cursor of the previous
+    page) for keyset pagination on (date, id). include_trade=true embeds a
+    summary of each entry's linked trade.
+    """
     try:
         user = request.current_user
         
@@ -29,12 +41,19 @@ def get_journal_entries():
         search = request.args.get('search', '')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
+        include_trade = request.args.get('include_trade', '').lower() in ('1', 'true', 'yes')
         
         # Validate pagination parameters
         if page < 1:
             page = 1
         if per_page < 1 or per_page > 100:
             per_page = 10
+        if cursor and search:
+            return jsonify({
+                'success': False,
+                'error': 'cursor cannot be combined with search; use page instead'
+            }), 400
         
         # Build query - only get entries belonging to the current user
         query = JournalEntry.query.filter(JournalEntry.user_id == user.id)
@@ -55,31 +74,91 @@ def get_journal_entries():
         if date_to:
             query = query.filter(JournalEntry.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
         if search:
-            # Search in notes field
-            query = query.filter(JournalEntry.notes.ilike(f'%{search}%'))
+            # Full-text search in notes (ILIKE outside PostgreSQL)
+            query = filter_by_search(query, search)
         
-        # Get total count for pagination
-        total_count = query.count()
-        
-        # Calculate pagination
         offset = (page - 1) * per_page
-        total_pages = (total_count + per_page - 1) // per_page
-        
-        # Get paginated entries ordered by date descending
-        entries = query.order_by(JournalEntry.date.desc())\
-            .offset(offset)\
-            .limit(per_page)\
-            .all()
         
-        return jsonify({
-            'success': True,
-            'entries': [entry.to_dict() for entry in entries],
-            'pagination': {
+        if search:
+            # Ranked matches with highlighted snippets, counted in the same query
+            results, total_count = fetch_search_page(query, search, offset, per_page, include_trade)
+        else:
+            # Total of all matching entries, counted by the page query itself. A scalar
+            # subquery lets PostgreSQL use an index-only count and stop the page scan
+            # at LIMIT, which COUNT(*) OVER() cannot.
+            total = query.with_entities(func.count()).statement\
+                .correlate(None)\
+                .scalar_subquery()
+            
+            page_query = query
+            if include_trade:
+                # Embed the linked trade through the same query
+                page_query = page_query.outerjoin(JournalEntry.trade)\
+                    .options(contains_eager(JournalEntry.trade))
+            
+            if cursor:
+                try:
+                    cursor_date, cursor_id = decode_cursor(cursor, 2)
+                    cursor_date = datetime.strptime(cursor_date, '%Y-%m-%d').date()
+                except (ValueError, TypeError):
+                    return jsonify({
+                        'success': False,
+                        'error': 'Invalid cursor'
+                    }), 400
+                # Keyset: entries strictly after the cursor in (date, id) descending order
+                page_query = page_query.filter(
+                    tuple_(JournalEntry.date, JournalEntry.id) < tuple_(cursor_date, cursor_id)
+                )
+            
+            # Newest first; with a cursor fetch one extra row to know whether more follow
+            rows = page_query.add_columns(total.label('total_count'))\
+                .order_by(JournalEntry.date.desc(), JournalEntry.id.desc())\
+                .offset(None if cursor else offset)\
+                .limit(per_page + 1 if cursor else per_page)\
+                .all()
+            results = [(row[0], None, None) for row in rows[:per_page]]
+            total_count = rows[0][1] if rows else None
+        
+        if total_count is None:
+            # Empty page: only a page past the end needs a separate count
+            total_count = query.count() if offset or cursor else 0
+        
+        entries_data = []
+        for entry, rank, snippet in results:
+            entry_dict = entry.to_dict()
+            if search:
+                entry_dict['rank'] = rank
+                entry_dict['snippet'] = snippet
+            if include_trade:
+                entry_dict['trade'] = entry.trade.to_summary_dict() if entry.trade else None
+            entries_data.append(entry_dict)
+        
+        if cursor:
+            has_more = len(rows) > per_page
+            pagination = {
+                'per_page': per_page,
+                'total_count': total_count
+            }
+        else:
+            has_more = offset + len(results) < total_count
+            pagination = {
                 'current_page': page,
                 'per_page': per_page,
                 'total_count': total_count,
-                'total_pages': total_pages
+                'total_pages': (total_count + per_page - 1) // per_page
             }
+        
+        # Keyset cursor for the next page (not available for ranked search results)
+        pagination['has_more'] = has_more
+        pagination['next_cursor'] = None
+        if has_more and not search:
+            last = results[-1][0]
+            pagination['next_cursor'] = encode_cursor([last.date, last.id])
+        
+        return jsonify({
+            'success': True,
+            'entries': entries_data,
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -149,6 +228,7 @@ def create_journal_entry():
 
 @journal_bp.route('/<entry_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_journal_entry(entry_id):
     """Get a specific journal entry by ID"""
     try:
@@ -264,10 +344,10 @@ def get_ai_insights():
                 'can_get_insights': False
             }), 429
         
-        # Get all journal entries for the current user
-        entries = JournalEntry.query.filter_by(user_id=user.id).order_by(JournalEntry.date.desc()).all()
+        # Nothing to analyze without journal entries
+        has_entries = db.session.query(JournalEntry.id).filter_by(user_id=user.id).first() is not None
         
-        if not entries:
+        if not has_entries:
             return jsonify({
                 'success': True,
                 'insights': 'No journal entries found to analyze.',
@@ -275,104 +355,42 @@ def get_ai_insights():
                 'can_get_insights': True
             }), 200
         
-        # Prepare data for AI analysis
-        journal_text = ""
-        for entry in entries:
-            trade_info = ""
-            if entry.trade_id and entry.trade:
-                trade = entry.trade
-                trade_info = f" (Trade: {trade.ticker_symbol}, {trade.trading_type}, {trade.win_loss})"
-            
-            journal_text += f"Date: {entry.date}, Type: {entry.entry_type}{trade_info}\nNotes: {entry.notes}\n\n"
-        
-        # Generate AI insights
-        openai = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        try:
-            prompt = f"""
-            Analyze the following trading journal entries and provide insights in JSON format.
-            
-            Journal Entries:
-            {journal_text}
-            
-            Please provide analysis in the following JSON structure:
-            {{
-                "key_patterns": ["pattern1", "pattern2", "pattern3"],
-                "strengths": ["strength1", "strength2"],
-                "areas_for_improvement": ["area1", "area2"],
-                "emotional_state_analysis": "brief analysis of emotional patterns",
-                "trading_performance_insights": "insights about trading performance",
-                "recommendations": ["recommendation1", "recommendation2", "recommendation3"],
-                "learning_resources": {{
-                    "videos": [
-                        {{
-                            "title": "Specific video title based on analysis",
-                            "description": "Why this video is recommended",
-                            "search_query": "specific search terms to find this video",
-                            "category": "patterns|strengths|improvements|emotions|performance"
-                        }}
-                    ],
-                    "books": [
-                        {{
-                            "title": "Specific book title based on analysis",
-                            "description": "Why this book is recommended",
-                            "search_query": "specific search terms to find this book",
-                            "category": "patterns|strengths|improvements|emotions|performance"
-                        }}
-                    ]
-                }}
-            }}
-            
-            Focus on:
-            - Recurring patterns in trading behavior
-            - Emotional states and their impact on trading
-            - Performance trends
-            - Risk management practices
-            - Areas for improvement
-            - Actionable recommendations
-            
-            For learning resources:
-            - Recommend 2-3 specific YouTube videos that would help with identified issues
-            - Recommend 2-3 specific books that address the user's needs
-            - Make recommendations highly specific to the user's trading patterns
-            - Focus on practical, actionable learning content
-            - Ensure video titles and book titles are real and searchable
-            """
-            
-            response = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert trading coach and analyst. Analyze trading journal entries to provide actionable insights and recommendations. Additionally, provide specific, relevant learning resources including YouTube videos and books that directly address the user's identified needs and trading patterns. Focus on practical, searchable content that users can actually find and benefit from."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            insights = json.loads(response.choices[0].message.content)
-            
-            # Store the insights in the database
-            insights_record = AIInsights(
-                user_id=user.id,
-                insights_data=json.dumps(insights)
-            )
-            db.session.add(insights_record)
-            
-            # Update user's last AI insights date
-            user.last_ai_insights_date = datetime.utcnow()
-            db.session.commit()
-            
-        except Exception as ai_error:
-            insights = f"Unable to generate AI insights at this time. Error: {str(ai_error)}"
+        # The journal is hashed once here and the fingerprint passed down.
+        # An unchanged journal returns the stored insights without calling the model.
+        fingerprint = insights_fingerprint(user.id)
+        insights = get_memoized_insights(user.id, fingerprint)
+        memoized = insights is not None
+        
+        # Generation runs on the insights worker pool and the client polls
+        # /api/journal/insights/jobs/<id>, so model calls never hold a request worker.
+        # sync=1 generates inline instead, each model request bounded by INSIGHTS_JOB_TIMEOUT.
+        if not memoized and request.args.get('sync', '').lower() not in ('1', 'true', 'yes'):
+            job = enqueue_insights_job(user.id)
+            return jsonify({
+                'success': True,
+                'job': job.to_dict()
+            }), 202
+        
+        if not memoized:
+            # Generate AI insights from the cached weekly digests (only changed weeks are re-summarized)
+            try:
+                client = get_openai_client(timeout=INSIGHTS_JOB_TIMEOUT, max_retries=0)
+                insights, memoized = generate_insights(user.id, client, fingerprint=fingerprint)
+                
+                if not memoized:
+                    # Update user's last AI insights date
+                    user.last_ai_insights_date = datetime.utcnow()
+                db.session.commit()
+                
+            except Exception as ai_error:
+                db.session.rollback()
+                insights = f"Unable to generate AI insights at this time. Error: {str(ai_error)}"
         
         return jsonify({
             'success': True,
             'insights': insights,
-            'plan': user.plan,
-            'can_get_insights': user.can_get_ai_insights(),
-            'last_insights_date': user.last_ai_insights_date.isoformat() if user.last_ai_insights_date else None,
-            'next_available_date': user.get_next_ai_insights_date().isoformat() if user.get_next_ai_insights_date() else None
+            'memoized': memoized,
+            **user.insights_plan_info()
         }), 200
         
     except Exception as e:
@@ -381,42 +399,79 @@ def get_ai_insights():
             'error': str(e)
         }), 500 
 
+def stored_insights_response(user, **extra):
+    """Response with the user's most recent stored insights and plan info; extra keys are added as is"""
+    # Get the most recent AI insights for this user
+    latest_insights = AIInsights.query.filter_by(user_id=user.id).order_by(AIInsights.created_at.desc()).first()
+    
+    if not latest_insights:
+        # For first-time users, return plan info without insights
+        return jsonify({
+            'success': False,
+            'error': 'No stored insights found',
+            **user.insights_plan_info(),
+            **extra
+        }), 404
+    
+    # Parse the stored insights
+    insights_data = json.loads(latest_insights.insights_data)
+    
+    return jsonify({
+        'success': True,
+        'insights': insights_data,
+        **user.insights_plan_info(),
+        'insights_created_at': latest_insights.created_at.isoformat(),
+        **extra
+    }), 200
+
 @journal_bp.route('/stored-insights', methods=['GET'])
 @require_auth
 def get_stored_insights():
     """Get the most recent stored AI insights for the user"""
     try:
-        user = request.current_user
+        return stored_insights_response(request.current_user)
         
-        # Get the most recent AI insights for this user
-        latest_insights = AIInsights.query.filter_by(user_id=user.id).order_by(AIInsights.created_at.desc()).first()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@journal_bp.route('/insights/jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_insights_job(job_id):
+    """Get the status of a background insights job; once completed the stored insights are included"""
+    try:
+        user = request.current_user
         
-        if not latest_insights:
-            # For first-time users, return plan info without insights
+        job = InsightsJob.query.filter_by(id=job_id, user_id=user.id).first()
+        if not job:
             return jsonify({
                 'success': False,
-                'error': 'No stored insights found',
-                'plan': user.plan,
-                'can_get_insights': user.can_get_ai_insights(),
-                'last_insights_date': user.last_ai_insights_date.isoformat() if user.last_ai_insights_date else None,
-                'next_available_date': user.get_next_ai_insights_date().isoformat() if user.get_next_ai_insights_date() else None
+                'error': 'Insights job not found'
             }), 404
         
-        # Parse the stored insights
-        insights_data = json.loads(latest_insights.insights_data)
+        # A job whose worker died never finishes on its own
+        if is_stale_insights_job(job):
+            fail_stale_insights_job(job)
+        
+        if job.status == 'completed':
+            return stored_insights_response(user, job=job.to_dict())
+        
+        if job.status == 'failed':
+            return jsonify({
+                'success': False,
+                'error': job.error or 'Failed to generate insights',
+                'job': job.to_dict()
+            }), 200
         
         return jsonify({
             'success': True,
-            'insights': insights_data,
-            'plan': user.plan,
-            'can_get_insights': user.can_get_ai_insights(),
-            'last_insights_date': user.last_ai_insights_date.isoformat() if user.last_ai_insights_date else None,
-            'next_available_date': user.get_next_ai_insights_date().isoformat() if user.get_next_ai_insights_date() else None,
-            'insights_created_at': latest_insights.created_at.isoformat()
+            'job': job.to_dict()
         }), 200
         
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500
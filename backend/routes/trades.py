@@ -2,16 +2,35 @@ from flask import Blueprint, request, jsonify
 from database import db
 from models.trade import Trade
 from models.position import Position
-from utils.decorators import require_auth
+from utils.decorators import require_auth, conditional_get
+from services.stats_service import StatsDelta
+from utils.query_utils import encode_cursor, decode_cursor
+from utils.serialization import (
+    TRADE_COLUMNS, POSITION_COLUMNS, POSITION_SUMMARY_COLUMNS,
+    pick_columns, select_rows, shape_rows, json_response
+)
+from sqlalchemy import tuple_
 from datetime import datetime
 import uuid
 
 trades_bp = Blueprint('trades', __name__)
 
+# Page sizes for keyset pagination of GET /api/trades/
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
 @trades_bp.route('/', methods=['GET'])
 @require_auth
+@conditional_get
 def get_trades():
-    """Get all trades for the authenticated user with optional filtering"""
+    """Get all trades for the authenticated user with optional filtering
+    
+    Pass limit (and cursor from the previous page's next_cursor) to page through
+    trades with keyset pagination on (status, date, id). Without them every
+    matching trade is returned, as before. format=columnar returns trades and
+    open positions as one array per field, and fields=a,b,... limits the
+    trade fields sent.
+    """
     try:
         user = request.current_user
         
@@ -23,6 +42,20 @@ def get_trades():
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
         
+        # Optional keyset pagination
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        paginate = limit is not None or cursor is not None
+        
+        columnar = request.args.get('format') == 'columnar'
+        try:
+            trade_columns = pick_columns(TRADE_COLUMNS, request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
         # Build query - only get trades for the current user
         query = Trade.query.filter(Trade.user_id == user.id)
         
@@ -39,17 +72,68 @@ def get_trades():
         if date_to:
             query = query.filter(Trade.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
         
-        # Order by status (OPEN first) then by date descending
-        trades = query.order_by(Trade.status.desc(), Trade.date.desc()).all()
+        if not paginate:
+            # Order by status (OPEN first) then by date descending
+            trades = select_rows(query.order_by(Trade.status.desc(), Trade.date.desc()), trade_columns, columnar)
+            
+            # Get open positions for additional context
+            open_positions = select_rows(
+                Position.query.filter_by(user_id=user.id, status='OPEN'),
+                POSITION_COLUMNS,
+                columnar
+            )
+            
+            return json_response({
+                'success': True,
+                'trades': trades,
+                'open_positions': open_positions
+            })
         
-        # Get open positions for additional context
-        open_positions = Position.query.filter_by(user_id=user.id, status='OPEN').all()
+        limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+        if cursor:
+            try:
+                cursor_status, cursor_date, cursor_id = decode_cursor(cursor, 3)
+                cursor_date = datetime.strptime(cursor_date, '%Y-%m-%d').date()
+            except (ValueError, TypeError):
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }), 400
+            # Rows strictly after the cursor in (status, date, id) descending order
+            query = query.filter(
+                tuple_(Trade.status, Trade.date, Trade.id) < tuple_(cursor_status, cursor_date, cursor_id)
+            )
         
-        return jsonify({
+        # Fetch one extra row to know whether another page exists. The sort keys
+        # are selected after the requested fields, for the cursor
+        rows = query.with_entities(
+            *trade_columns,
+            Trade.status.label('cursor_status'),
+            Trade.date.label('cursor_date'),
+            Trade.id.label('cursor_id')
+        ).order_by(Trade.status.desc(), Trade.date.desc(), Trade.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(list(rows[-1][-3:]))
+        
+        response = {
             'success': True,
-            'trades': [trade.to_dict() for trade in trades],
-            'open_positions': [pos.to_dict() for pos in open_positions]
-        }), 200
+            'trades': shape_rows(rows, trade_columns, columnar),
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+        
+        # Open positions only accompany the first page
+        if not cursor:
+            response['open_positions'] = select_rows(
+                Position.query.filter_by(user_id=user.id, status='OPEN'),
+                POSITION_COLUMNS,
+                columnar
+            )
+        
+        return json_response(response)
         
     except Exception as e:
         return jsonify({
@@ -106,6 +190,8 @@ def create_trade():
             transaction_type=data.get('transaction_type', 'stock')
         )
         
+        stats_delta = StatsDelta(user.id)
+        
         # If this is an open position, create a position record
         if status == 'OPEN':
             position = Position(
@@ -116,9 +202,12 @@ def create_trade():
                 buy_date=trade_date
             )
             db.session.add(position)
+            stats_delta.add_position(position)
             trade.position_id = position.id
 
         db.session.add(trade)
+        stats_delta.add_trade(trade)
+        stats_delta.apply()
         db.session.commit()
 
         return jsonify({
@@ -137,6 +226,7 @@ def create_trade():
 
 @trades_bp.route('/<trade_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_trade(trade_id):
     """Get a specific trade by ID for the authenticated user"""
     try:
@@ -174,6 +264,10 @@ def update_trade(trade_id):
             }), 404
 
         data = request.get_json()
+        
+        # Take the trade out of the rollup before it changes
+        stats_delta = StatsDelta(user.id)
+        stats_delta.remove_trade(trade)
 
         # Update fields if provided
         if 'date' in data:
@@ -204,6 +298,8 @@ def update_trade(trade_id):
         total_cost = trade.price_cost_basis
         trade.win_loss = 'Win' if trade.proceeds > total_cost else 'Loss'
 
+        stats_delta.add_trade(trade)
+        stats_delta.apply()
         db.session.commit()
 
         return jsonify({
@@ -222,19 +318,19 @@ def update_trade(trade_id):
 @trades_bp.route('/<trade_id>', methods=['DELETE'])
 @require_auth
 def delete_trade(trade_id):
-    print("deteing trade")
     """Delete a trade"""
     try:
         user = request.current_user
         trade = Trade.query.filter_by(id=trade_id, user_id=user.id).first()
-        print(trade)
         if not trade:
             return jsonify({
                 'success': False,
                 'error': 'Trade not found'
             }), 404
+        stats_delta = StatsDelta(user.id)
+        stats_delta.remove_trade(trade)
         db.session.delete(trade)
-        print("success delete")
+        stats_delta.apply()
         db.session.commit()
         return jsonify({
             'success': True,
@@ -263,8 +359,13 @@ def catch_all_options(dummy):
 
 @trades_bp.route('/positions/', methods=['GET'])
 @require_auth
+@conditional_get
 def get_positions():
-    """Get all consolidated positions for the authenticated user"""
+    """Get all consolidated positions for the authenticated user
+
+    format=columnar returns the positions as one array per field, and
+    fields=a,b,... limits the fields sent.
+    """
     try:
         user = request.current_user
         
@@ -272,6 +373,15 @@ def get_positions():
         status = request.args.get('status')  # 'OPEN' or 'CLOSED'
         symbol = request.args.get('symbol')
         
+        columnar = request.args.get('format') == 'columnar'
+        try:
+            position_columns = pick_columns(POSITION_SUMMARY_COLUMNS, request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
         # Build query - only get positions for the current user
         query = Position.query.filter(Position.user_id == user.id)
         
@@ -281,30 +391,14 @@ def get_positions():
             query = query.filter(Position.symbol.ilike(f'%{symbol}%'))
         
         # Order by status (OPEN first) then by symbol
-        positions = query.order_by(Position.status.desc(), Position.symbol.asc()).all()
-        
-        # Convert to dictionary format
-        positions_data = []
-        for position in positions:
-            position_dict = {
-                'id': position.id,
-                'symbol': position.symbol,
-                'status': position.status,
-                'total_shares': float(position.total_shares),
-                'buy_price': float(position.buy_price) if position.buy_price else None,
-                'sell_price': float(position.sell_price) if position.sell_price else None,
-                'buy_date': position.buy_date.isoformat() if position.buy_date else None,
-                'sell_date': position.sell_date.isoformat() if position.sell_date else None,
-                'pnl': float(position.pnl) if position.pnl else None,
-                'created_at': position.created_at.isoformat(),
-                'updated_at': position.updated_at.isoformat()
-            }
-            positions_data.append(position_dict)
+        rows = query.with_entities(*position_columns)\
+            .order_by(Position.status.desc(), Position.symbol.asc())\
+            .all()
         
-        return jsonify({
+        return json_response({
             'success': True,
-            'positions': positions_data,
-            'total_count': len(positions_data)
+            'positions': shape_rows(rows, position_columns, columnar),
+            'total_count': len(rows)
         })
         
     except Exception as e:
@@ -315,11 +409,25 @@ def get_positions():
 
 @trades_bp.route('/positions/<position_id>', methods=['GET','DELETE'])
 @require_auth
+@conditional_get
 def get_position_details(position_id):
-    """Get detailed information for a specific position including individual trades"""
+    """Get detailed information for a specific position including individual trades
+
+    On GET, format=columnar returns the trades as one array per field, and
+    fields=a,b,... limits the trade fields sent.
+    """
     try:
         user = request.current_user
         
+        columnar = request.args.get('format') == 'columnar'
+        try:
+            trade_columns = pick_columns(TRADE_COLUMNS, request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
         # Get the position
         position = Position.query.filter_by(
             id=position_id, 
@@ -340,11 +448,15 @@ def get_position_details(position_id):
                 user_id=user.id
             ).all()
             
+            stats_delta = StatsDelta(user.id)
             for trade in trades:
+                stats_delta.remove_trade(trade)
                 db.session.delete(trade)
             
             # Delete the position
+            stats_delta.remove_position(position)
             db.session.delete(position)
+            stats_delta.apply()
             db.session.commit()
             
             return jsonify({
@@ -354,12 +466,12 @@ def get_position_details(position_id):
         
         # Handle GET request
         # Get all trades for this position
-        trades = Trade.query.filter_by(
-            position_id=position_id,
-            user_id=user.id
-        ).order_by(Trade.date.desc()).all()
+        rows = Trade.query.filter_by(position_id=position_id, user_id=user.id)\
+            .with_entities(*trade_columns)\
+            .order_by(Trade.date.desc())\
+            .all()
         
-        # Convert position to dictionary
+        # Same fields as the positions list
         position_dict = {
             'id': position.id,
             'symbol': position.symbol,
@@ -374,14 +486,11 @@ def get_position_details(position_id):
             'updated_at': position.updated_at.isoformat()
         }
         
-        # Convert trades to dictionary
-        trades_data = [trade.to_dict() for trade in trades]
-        
-        return jsonify({
+        return json_response({
             'success': True,
             'position': position_dict,
-            'trades': trades_data,
-            'trades_count': len(trades_data)
+            'trades': shape_rows(rows, trade_columns, columnar),
+            'trades_count': len(rows)
         })
         
     except Exception as e:
@@ -5,9 +5,12 @@ Migration runner script for deployment
 import os
 import sys
 from flask import Flask
-from flask_migrate import upgrade
+from flask_migrate import Migrate, upgrade
 from app import app, db
 
+# The app only registers Flask-Migrate for the `flask` CLI
+Migrate(app, db)
+
 def run_migrations():
     """Run database migrations"""
     try:
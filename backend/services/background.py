@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+# Worker pools by name, and the environment variable that sizes each (default 2).
+# Insights jobs wait on the model and sleep between retries, so they get their own
+# pool instead of holding up statement imports.
+POOL_SIZE_SETTINGS = {'background': 'BACKGROUND_WORKERS', 'insights': 'INSIGHTS_WORKERS'}
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(pool='background'):
+    """Return the named process-wide worker pool, creating it on first use.
+
+    Created lazily so that forked server workers each start their own threads.
+    """
+    with _executor_lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv(POOL_SIZE_SETTINGS[pool], 2)),
+                thread_name_prefix=pool
+            )
+            _executors[pool] = executor
+    return executor
+
+
+def submit(app, fn, *args, pool='background', **kwargs):
+    """Run fn(*args, **kwargs) on the named worker pool inside an application context"""
+    def run():
+        with app.app_context():
+            return fn(*args, **kwargs)
+    return get_executor(pool).submit(run)
@@ -0,0 +1,155 @@
+from flask import current_app
+from sqlalchemy import update
+from database import db
+from models.import_job import ImportJob
+from services.background import submit
+from services.import_service import run_statement_import
+from datetime import datetime, timedelta
+import json
+import os
+import tempfile
+
+# Longest an import can stay queued or running (seconds) before its worker is presumed dead
+IMPORT_JOB_TIMEOUT = float(os.getenv('IMPORT_JOB_TIMEOUT', 1800))
+ACTIVE_STATUSES = ('queued', 'running')
+STALE_JOB_ERROR = 'The import was interrupted before it finished. Please upload the statement again.'
+
+
+def get_staging_dir():
+    """Directory where uploads wait for a worker (IMPORT_STAGING_DIR, defaults to the system temp dir)"""
+    path = os.getenv('IMPORT_STAGING_DIR') or os.path.join(tempfile.gettempdir(), 'traderdashpro-imports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enqueue_import_job(user_id, platform, file):
+    """Stage an uploaded statement to disk, record an import job and hand it to the worker pool"""
+    job = ImportJob(user_id=user_id, platform=platform, filename=file.filename)
+    job.file_path = os.path.join(get_staging_dir(), f"{job.id}.csv")
+    file.save(job.file_path)
+
+    db.session.add(job)
+    db.session.commit()
+
+    submit(current_app._get_current_object(), run_import_job, job.id)
+    return job
+
+
+def is_stale_import_job(job):
+    """True when a queued or running job has outlived IMPORT_JOB_TIMEOUT"""
+    return (job.status in ACTIVE_STATUSES and job.created_at is not None
+            and job.created_at < datetime.utcnow() - timedelta(seconds=IMPORT_JOB_TIMEOUT))
+
+
+def fail_stale_import_jobs(user_id=None):
+    """Fail queued or running imports older than IMPORT_JOB_TIMEOUT and delete their staged files.
+
+    A job accepted by a worker that was restarted or killed is otherwise left
+    in flight forever. Without a user_id every user's jobs are swept, along
+    with staged files that no job row refers to. Returns the number of jobs failed.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=IMPORT_JOB_TIMEOUT)
+    query = ImportJob.query.filter(ImportJob.status.in_(ACTIVE_STATUSES), ImportJob.created_at < cutoff)
+    if user_id is not None:
+        query = query.filter(ImportJob.user_id == user_id)
+
+    failed = 0
+    for job_id, file_path in query.with_entities(ImportJob.id, ImportJob.file_path).all():
+        # Guarded on status so a worker that finishes meanwhile keeps its result
+        result = db.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status.in_(ACTIVE_STATUSES))
+            .values(
+                status='failed',
+                error_count=ImportJob.error_count + 1,
+                errors=json.dumps([STALE_JOB_ERROR]),
+                finished_at=now
+            )
+        )
+        failed += result.rowcount
+        _remove_staged_file(file_path)
+    db.session.commit()
+
+    if user_id is None:
+        _remove_orphaned_staged_files(cutoff)
+    return failed
+
+
+def _remove_staged_file(path):
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _remove_orphaned_staged_files(cutoff):
+    """Delete staged uploads older than cutoff whose job is gone or no longer in flight"""
+    directory = get_staging_dir()
+    staged = {}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if datetime.utcfromtimestamp(os.path.getmtime(path)) < cutoff:
+                staged[os.path.splitext(name)[0]] = path
+        except OSError:
+            continue
+    if not staged:
+        return
+    active = {
+        job_id for (job_id,) in db.session.query(ImportJob.id).filter(
+            ImportJob.id.in_(list(staged)),
+            ImportJob.status.in_(ACTIVE_STATUSES)
+        )
+    }
+    for job_id, path in staged.items():
+        if job_id not in active:
+            _remove_staged_file(path)
+
+
+def _report_progress(job_id, rows_processed):
+    """Record parse progress on a separate connection so pollers see it before the import commits"""
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id)
+            .values(rows_processed=rows_processed)
+        )
+
+
+def run_import_job(job_id):
+    """Parse and persist a staged statement, recording the outcome on the job row"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.status != 'queued':
+        return
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        with open(job.file_path, 'rb') as file:
+            summary = run_statement_import(
+                job.user_id,
+                job.platform,
+                file,
+                on_progress=lambda rows: _report_progress(job_id, rows)
+            )
+        job.status = 'completed'
+        job.rows_processed = summary['num_trades']
+        job.trades_added = summary['trades_added']
+        job.error_count = summary['error_count']
+        job.errors = json.dumps(summary['errors'])
+        job.summary = json.dumps(summary)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Import job {job_id} failed: {e}")
+        job.status = 'failed'
+        job.error_count = job.error_count + 1
+        job.errors = json.dumps([str(e)])
+    finally:
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        _remove_staged_file(job.file_path)
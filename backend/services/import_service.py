@@ -0,0 +1,465 @@
+from sqlalchemy import insert
+from database import db
+from models.trade import Trade
+from models.position import Position
+from services.stats_service import StatsDelta
+from utils.data_version import bump_data_version
+from services.statement_parsers import PARSERS, StatementParseError
+from datetime import datetime
+from collections import defaultdict
+from functools import lru_cache
+import csv
+import io
+import uuid
+
+# Report parse progress every this many rows
+PROGRESS_INTERVAL = 1000
+# Keep at most this many row-level error messages per import
+MAX_REPORTED_ERRORS = 50
+
+
+class StatementImportError(Exception):
+    """Raised when a statement cannot be imported"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ImportErrorLog:
+    """Counts row-level import problems and keeps the first few messages"""
+
+    def __init__(self):
+        self.count = 0
+        self.messages = []
+
+    def add(self, message):
+        self.count += 1
+        if len(self.messages) < MAX_REPORTED_ERRORS:
+            self.messages.append(message)
+
+
+class BulkImportWriter:
+    """Persists the trades and positions produced by a statement import.
+
+    Existing positions for every symbol in the file are fetched with one query
+    up front, and trades are collected as plain column dicts instead of one ORM
+    object per row. They are streamed in with COPY on PostgreSQL, and written
+    with one executemany INSERT elsewhere.
+    """
+
+    def __init__(self, user_id, symbols):
+        self.user_id = user_id
+        self.stats_delta = StatsDelta(user_id)
+        self._trade_rows = []
+        self._new_positions = []
+        self._positions = {}
+        symbols = list(symbols)
+        if symbols:
+            existing = Position.query.filter(
+                Position.user_id == user_id,
+                Position.symbol.in_(symbols)
+            ).all()
+            for position in existing:
+                self._positions.setdefault(position.symbol, []).append(position)
+
+    def find_position(self, symbol, open_only=False):
+        """Return an existing position for the symbol, preferring an open one"""
+        positions = self._positions.get(symbol, [])
+        for position in positions:
+            if position.status == 'OPEN':
+                return position
+        if open_only or not positions:
+            return None
+        return positions[0]
+
+    def update_position(self, position, **fields):
+        """Apply changes to an existing position, keeping the stats rollup in step"""
+        self.stats_delta.remove_position(position)
+        for name, value in fields.items():
+            setattr(position, name, value)
+        self.stats_delta.add_position(position)
+
+    def add_position(self, position):
+        """Queue a new position; it is inserted before any of its trades"""
+        self._new_positions.append(position)
+        self._positions.setdefault(position.symbol, []).append(position)
+        self.stats_delta.add_position(position)
+
+    def add_trade(self, **fields):
+        """Queue a trade; accepts the same arguments as Trade()"""
+        row = Trade.column_values(user_id=self.user_id, **fields)
+        self._trade_rows.append(row)
+        self.stats_delta.add_trade(row)
+
+    def flush(self):
+        """Write queued positions, trades and the stats rollup. Returns the number of trades written."""
+        if self._new_positions:
+            db.session.add_all(self._new_positions)
+            db.session.flush()
+        if self._trade_rows:
+            if db.session.get_bind().dialect.name == 'postgresql':
+                _copy_trades(self._trade_rows)
+            else:
+                # The table insert keeps every row in one batch; the ORM insert splits
+                # the batch each time the set of None columns changes
+                db.session.execute(insert(Trade.__table__), self._trade_rows)
+            # Bulk inserts skip the ORM flush that bumps the user's data version
+            bump_data_version(self.user_id)
+        self.stats_delta.apply()
+        trades_written = len(self._trade_rows)
+        self._trade_rows = []
+        self._new_positions = []
+        return trades_written
+
+
+def _copy_trades(rows):
+    """Write trade rows with one COPY on the session's connection.
+
+    COPY skips the column defaults SQLAlchemy fills in on INSERT, so the id
+    and timestamps are set here.
+    """
+    columns = [column.name for column in Trade.__table__.columns]
+    now = datetime.utcnow().isoformat(' ')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        row = dict(row, id=str(uuid.uuid4()), created_at=now, updated_at=now)
+        # An unquoted empty field is NULL in COPY's CSV format
+        writer.writerow(['' if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY trades ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+@lru_cache(maxsize=4096)
+def _parse_exec_date(exec_time_str):
+    """The date of a statement exec time, or None; cached since a statement repeats the same few hundred days"""
+    try:
+        return datetime.strptime(exec_time_str.split()[0], '%m/%d/%y').date()
+    except Exception:
+        try:
+            return datetime.strptime(exec_time_str, '%m/%d/%y').date()
+        except Exception:
+            return None
+
+
+def _read_statement(trades):
+    """Turn a parse failure anywhere in the file into a StatementImportError.
+    
+    Every row is parsed before anything is written, so a corrupt file fails
+    the whole import instead of committing the rows ahead of the bad byte.
+    """
+    try:
+        yield from trades
+    except StatementParseError as e:
+        raise StatementImportError(str(e))
+
+
+def run_statement_import(user_id, platform, file, on_progress=None):
+    """Parse a broker statement and persist its trades and positions for a user.
+    
+    Runs parse -> group -> consolidate -> persist in a single pass over the
+    file and commits. Returns the import summary; raises StatementImportError
+    for unsupported platforms, unreadable or empty statements and failed commits.
+    on_progress, if given, is called with the number of rows parsed so far.
+    """
+    parser = PARSERS.get(platform.lower())
+    if parser is None:
+        raise StatementImportError('Unsupported platform. Please select Thinkorswim or Robinhood.')
+    print(f"Parsing {platform} statement...")
+    trades = _read_statement(parser(file))
+    errors = ImportErrorLog()
+
+    # Calculate P&L and group trades by symbol in a single pass over the parsed rows.
+    # Each action keeps the execution time from its original row, so consolidation
+    # never has to search the statement again.
+    pnl_by_symbol: dict[str, float] = {}
+    symbol_trades = defaultdict(list)
+    num_trades = 0
+    sample_trades = []
+    
+    for trade in trades:
+        num_trades += 1
+        if on_progress and num_trades % PROGRESS_INTERVAL == 0:
+            on_progress(num_trades)
+        if len(sample_trades) < 5:
+            sample_trades.append(trade)
+        
+        symbol = trade.get("Symbol", "").strip()
+        side = trade.get("Side", "").strip().upper()
+        qty = trade.get("Qty", "0")
+        price = trade.get("Price", "0")
+        
+        try:
+            # Handle both string and float values
+            if isinstance(qty, (int, float)):
+                qty_float = abs(float(qty))
+            else:
+                qty_str = str(qty).replace(",", "") if qty else "0"
+                qty_float = abs(float(qty_str))
+                
+            if isinstance(price, (int, float)):
+                price_float = float(price)
+            else:
+                price_str = str(price).replace(",", "") if price else "0"
+                price_float = float(price_str)
+        except Exception as e:
+            errors.add(f"Error converting values for {symbol}: {e}")
+            qty_float = 0.0
+            price_float = 0.0
+            
+        if symbol:
+            if symbol not in pnl_by_symbol:
+                pnl_by_symbol[symbol] = 0.0
+            if side == "BUY":
+                pnl_by_symbol[symbol] -= qty_float * price_float
+            elif side == "SELL":
+                pnl_by_symbol[symbol] += qty_float * price_float
+            symbol_trades[symbol].append({
+                "side": side,
+                "qty": qty_float,
+                "price": price_float,
+                "exec_time": trade.get('Exec Time') or trade.get('ExecTime') or trade.get('Date')
+            })
+    
+    print(f"Parsed {num_trades} trades from {platform} statement")
+    
+    if on_progress:
+        on_progress(num_trades)
+    
+    if not num_trades:
+        raise StatementImportError('No trades found in the statement.')
+
+    # Process each symbol for position tracking with consolidation
+    print(f"Starting position tracking for {len(symbol_trades)} symbols...")
+    
+    # Existing positions for every symbol in the file are loaded in one query
+    writer = BulkImportWriter(user_id, symbol_trades.keys())
+    
+    for symbol, actions in symbol_trades.items():
+        # Separate BUY and SELL actions
+        buy_actions = []
+        sell_actions = []
+        
+        for action in actions:
+            try:
+                # Extract trade details
+                side = action['side']
+                qty = action['qty']
+                price = action['price']
+                exec_date = _parse_exec_date(action['exec_time']) if action['exec_time'] else None
+                
+                if exec_date is None:
+                    errors.add(f"Skipping {symbol} trade due to date parsing failure: {action['exec_time']!r}")
+                    continue
+                
+                # Store action with date
+                action_data = {
+                    'side': side,
+                    'qty': qty,
+                    'price': price,
+                    'date': exec_date
+                }
+                
+                if side == 'BUY':
+                    buy_actions.append(action_data)
+                elif side == 'SELL':
+                    sell_actions.append(action_data)
+                    
+            except Exception as e:
+                errors.add(f"Error processing {symbol} trade: {e}")
+                continue
+        
+        if not buy_actions and not sell_actions:
+            errors.add(f"Skipping {symbol}: no trades with a usable date")
+            continue
+        
+        # Consolidate ALL BUY actions for this symbol (across all dates)
+        total_buy_shares = 0
+        total_buy_cost = 0.0
+        earliest_buy_date = None
+        
+        for buy_action in buy_actions:
+            total_buy_shares += buy_action['qty']
+            total_buy_cost += buy_action['qty'] * buy_action['price']
+            if earliest_buy_date is None or buy_action['date'] < earliest_buy_date:
+                earliest_buy_date = buy_action['date']
+        
+        # Consolidate ALL SELL actions for this symbol (across all dates)
+        total_sell_shares = 0
+        total_sell_cost = 0.0
+        latest_sell_date = None
+        
+        for sell_action in sell_actions:
+            total_sell_shares += sell_action['qty']
+            total_sell_cost += sell_action['qty'] * sell_action['price']
+            if latest_sell_date is None or sell_action['date'] > latest_sell_date:
+                latest_sell_date = sell_action['date']
+        
+        # Calculate weighted averages
+        buy_avg_price = total_buy_cost / total_buy_shares if total_buy_shares > 0 else 0
+        sell_avg_price = total_sell_cost / total_sell_shares if total_sell_shares > 0 else 0
+        
+        # Handle symbols with no BUY trades (SELL-only positions)
+        if total_buy_shares == 0:
+            # For SELL-only positions, use sell date as buy date and sell price as buy price
+            # This represents a "short sale" or "sold without owning" scenario
+            buy_date = latest_sell_date  # Use the sell date as buy date
+            buy_price = sell_avg_price   # Use sell price as buy price
+            remaining_shares = total_sell_shares  # Show the actual shares that were sold
+            status = 'CLOSED'           # Always closed for SELL-only
+            
+            # Calculate P&L for SELL-only positions (sell_price - buy_price = 0 since they're the same)
+            pnl = 0.0  # For SELL-only positions, P&L is 0 since buy_price = sell_price
+            
+            # Create or update position
+            position = writer.find_position(symbol)
+            if position:
+                writer.update_position(
+                    position,
+                    total_shares=remaining_shares,
+                    buy_price=buy_price,
+                    buy_date=buy_date,
+                    sell_price=sell_avg_price,
+                    sell_date=latest_sell_date,
+                    status=status,
+                    pnl=pnl,
+                    updated_at=datetime.utcnow()
+                )
+            else:
+                position = Position(
+                    user_id=user_id,
+                    symbol=symbol,
+                    total_shares=remaining_shares,
+                    buy_price=buy_price,
+                    buy_date=buy_date,
+                    sell_price=sell_avg_price,
+                    sell_date=latest_sell_date,
+                    status=status,
+                    pnl=pnl
+                )
+                writer.add_position(position)
+            
+            # Create individual SELL trade records
+            for sell_action in sell_actions:
+                writer.add_trade(
+                    date=sell_action['date'],
+                    ticker_symbol=symbol,
+                    number_of_shares=int(sell_action['qty']),
+                    buy_price=0,  # No actual buy price for SELL-only trades
+                    sell_price=sell_action['price'],
+                    trading_type='Swing',
+                    status='CLOSED',
+                    position_id=position.id,  # Link to the position
+                    shares_remaining=0,
+                    transaction_type='stock'
+                )
+            
+            continue
+        
+        # Determine position status and remaining shares
+        net_shares = total_buy_shares - total_sell_shares
+        
+        if net_shares > 0:
+            # Position is still OPEN
+            status = 'OPEN'
+            remaining_shares = net_shares
+            # For open positions, calculate realized P&L from shares that were sold
+            pnl = (sell_avg_price - buy_avg_price) * total_sell_shares if total_sell_shares > 0 else 0.0
+        else:
+            # Position is CLOSED
+            status = 'CLOSED'
+            remaining_shares = 0
+            # For closed positions, P&L = (sell_price - buy_price) * shares_sold
+            pnl = (sell_avg_price - buy_avg_price) * total_sell_shares if total_sell_shares > 0 else 0.0
+        
+        # Create or update position
+        position = writer.find_position(symbol, open_only=True)
+        
+        if position:
+            # Update existing position
+            updates = {
+                'total_shares': remaining_shares,
+                'buy_price': buy_avg_price,
+                'buy_date': earliest_buy_date,
+                'status': status,
+                'pnl': pnl,
+                'updated_at': datetime.utcnow()
+            }
+            if status == 'CLOSED':
+                updates['sell_price'] = sell_avg_price
+                updates['sell_date'] = latest_sell_date
+            writer.update_position(position, **updates)
+        else:
+            # Create new position
+            position = Position(
+                user_id=user_id,
+                symbol=symbol,
+                total_shares=remaining_shares,
+                buy_price=buy_avg_price,
+                buy_date=earliest_buy_date,
+                status=status,
+                pnl=pnl
+            )
+            if status == 'CLOSED':
+                position.sell_price = sell_avg_price
+                position.sell_date = latest_sell_date
+            writer.add_position(position)
+        
+        # Create individual trade records for audit trail
+        for buy_action in buy_actions:
+            writer.add_trade(
+                date=buy_action['date'],
+                ticker_symbol=symbol,
+                number_of_shares=int(buy_action['qty']),
+                buy_price=buy_action['price'],
+                sell_price=None,
+                trading_type='Swing',
+                status='OPEN' if status == 'OPEN' else 'CLOSED',
+                position_id=position.id,
+                shares_remaining=int(buy_action['qty']) if status == 'OPEN' else 0,
+                transaction_type='stock'
+            )
+        
+        for sell_action in sell_actions:
+            writer.add_trade(
+                date=sell_action['date'],
+                ticker_symbol=symbol,
+                number_of_shares=int(sell_action['qty']),
+                buy_price=buy_avg_price,  # Use position's weighted average buy price
+                sell_price=sell_action['price'],
+                trading_type='Swing',
+                status='CLOSED',
+                position_id=position.id,
+                shares_remaining=0,
+                transaction_type='stock'
+            )
+    
+    # Write positions and trades in bulk, then commit all changes
+    try:
+        trades_added = writer.flush()
+        db.session.commit()
+        print(f"Successfully added {trades_added} trades to database")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error committing trades: {e}")
+        raise StatementImportError('Failed to save trades to database', status_code=500)
+    
+
+
+    total_pnl = float(sum(pnl_by_symbol.values()))
+
+    return {
+        "num_trades": num_trades,
+        "trades_added": trades_added,
+        "symbols": list(pnl_by_symbol.keys()),
+        "pnl_by_symbol": pnl_by_symbol,
+        "total_pnl": total_pnl,
+        "sample_trades": sample_trades,
+        "error_count": errors.count,
+        "errors": errors.messages
+    } 
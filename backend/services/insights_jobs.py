@@ -0,0 +1,114 @@
+from flask import current_app
+from sqlalchemy import update
+from database import db
+from models.ai_insights import AIInsights
+from models.insights_job import InsightsJob
+from models.user import User
+from services.background import submit
+from services.insights_service import generate_insights
+from services.openai_client import get_openai_client
+from datetime import datetime, timedelta
+import os
+import time
+
+# Per model request timeout (seconds), and how often a failed generation is retried
+INSIGHTS_JOB_TIMEOUT = float(os.getenv('INSIGHTS_JOB_TIMEOUT', 120))
+INSIGHTS_JOB_RETRIES = int(os.getenv('INSIGHTS_JOB_RETRIES', 2))
+INSIGHTS_JOB_RETRY_DELAY = float(os.getenv('INSIGHTS_JOB_RETRY_DELAY', 5))
+
+
+def _job_deadline():
+    """Longest a job can legitimately stay queued or running before it is considered abandoned"""
+    attempts = INSIGHTS_JOB_RETRIES + 1
+    return timedelta(seconds=attempts * (2 * INSIGHTS_JOB_TIMEOUT + INSIGHTS_JOB_RETRY_DELAY))
+
+
+def is_stale_insights_job(job):
+    """True when a queued or running job has outlived _job_deadline(), e.g. its worker process died"""
+    return (job.status in ('queued', 'running') and job.created_at is not None
+            and job.created_at < datetime.utcnow() - _job_deadline())
+
+
+def fail_stale_insights_job(job):
+    """Mark an abandoned job failed, unless its worker finished it meanwhile"""
+    db.session.execute(
+        update(InsightsJob)
+        .where(InsightsJob.id == job.id, InsightsJob.status.in_(['queued', 'running']))
+        .values(
+            status='failed',
+            error='Generating insights took too long. Please try again.',
+            finished_at=datetime.utcnow()
+        )
+    )
+    db.session.commit()
+
+
+def enqueue_insights_job(user_id):
+    """Record an insights job and hand it to the worker pool; reuses the user's job if one is in flight"""
+    active = InsightsJob.query.filter(
+        InsightsJob.user_id == user_id,
+        InsightsJob.status.in_(['queued', 'running']),
+        InsightsJob.created_at >= datetime.utcnow() - _job_deadline()
+    ).order_by(InsightsJob.created_at.desc()).first()
+    if active:
+        return active
+
+    job = InsightsJob(user_id=user_id)
+    db.session.add(job)
+    db.session.commit()
+
+    submit(current_app._get_current_object(), run_insights_job, job.id, pool='insights')
+    return job
+
+
+def run_insights_job(job_id):
+    """Generate insights for a queued job, retrying failures, and record the outcome on the job row"""
+    job = db.session.get(InsightsJob, job_id)
+    if job is None or job.status != 'queued':
+        return
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    # Retries are handled here, so the client fails fast on its own
+    client = get_openai_client(timeout=INSIGHTS_JOB_TIMEOUT, max_retries=0)
+
+    while True:
+        job.attempts += 1
+        db.session.commit()
+        try:
+            insights, memoized = generate_insights(job.user_id, client)
+            if insights is None:
+                job.status = 'failed'
+                job.error = 'No journal entries found to analyze.'
+            else:
+                if not memoized:
+                    user = db.session.get(User, job.user_id)
+                    user.last_ai_insights_date = datetime.utcnow()
+                db.session.flush()
+                job.insights_id = _latest_insights_id(job.user_id)
+                job.memoized = memoized
+                job.status = 'completed'
+                job.error = None
+            break
+        except Exception as e:
+            db.session.rollback()
+            print(f"Insights job {job_id} attempt {job.attempts} failed: {e}")
+            job.error = str(e)
+            if job.attempts > INSIGHTS_JOB_RETRIES:
+                job.status = 'failed'
+                break
+            db.session.commit()
+            time.sleep(INSIGHTS_JOB_RETRY_DELAY * job.attempts)
+
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _latest_insights_id(user_id):
+    latest = db.session.query(AIInsights.id)\
+        .filter(AIInsights.user_id == user_id)\
+        .order_by(AIInsights.created_at.desc())\
+        .first()
+    return latest[0] if latest else None
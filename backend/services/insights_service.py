@@ -0,0 +1,353 @@
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from database import db
+from models.journal import JournalEntry
+from models.journal_digest import JournalDigest
+from models.ai_insights import AIInsights
+from models.trade import Trade
+from services.openai_client import get_openai_client
+from utils.cache import TTLCache
+from utils.query_utils import date_bucket, format_bucket
+import hashlib
+import json
+import os
+import threading
+
+INSIGHTS_MODEL = os.getenv('OPENAI_INSIGHTS_MODEL', 'gpt-4o')
+DIGEST_MODEL = os.getenv('OPENAI_DIGEST_MODEL', 'gpt-4o-mini')
+
+# Only the most recent weeks with entries are summarized and sent to the model,
+# which bounds both the digest work and the insights prompt size
+DIGEST_WEEKS = int(os.getenv('INSIGHTS_DIGEST_WEEKS', 52))
+DIGEST_BATCH_WEEKS = 8  # weeks summarized per model call
+MAX_NOTE_CHARS = 1500  # per entry, in the digest request
+FALLBACK_SUMMARY_CHARS = 600
+
+# Bump whenever the prompts or digest format change so memoized insights are regenerated
+PROMPT_VERSION = 'weekly-digest-v1'
+
+# Memoized insights keyed by (user_id, fingerprint), in front of the ai_insights lookup
+insights_cache = TTLCache(
+    max_size=int(os.getenv('INSIGHTS_CACHE_SIZE', 256)),
+    ttl=int(os.getenv('INSIGHTS_CACHE_TTL', 3600))
+)
+
+_metrics_lock = threading.Lock()
+_metrics = {'model_calls': 0, 'digest_calls': 0, 'memory_hits': 0, 'stored_hits': 0}
+
+INSIGHTS_SYSTEM_PROMPT = (
+    "You are an expert trading coach and analyst. Analyze trading journal entries to provide actionable "
+    "insights and recommendations. Additionally, provide specific, relevant learning resources including "
+    "YouTube videos and books that directly address the user's identified needs and trading patterns. "
+    "Focus on practical, searchable content that users can actually find and benefit from."
+)
+
+INSIGHTS_PROMPT_TEMPLATE = """
+Analyze the following trading journal and provide insights in JSON format.
+The journal is given as weekly summaries, most recent week first.
+
+Journal Summary ({entry_count} entries over {week_count} weeks):
+{journal_digest}
+
+Please provide analysis in the following JSON structure:
+{{
+    "key_patterns": ["pattern1", "pattern2", "pattern3"],
+    "strengths": ["strength1", "strength2"],
+    "areas_for_improvement": ["area1", "area2"],
+    "emotional_state_analysis": "brief analysis of emotional patterns",
+    "trading_performance_insights": "insights about trading performance",
+    "recommendations": ["recommendation1", "recommendation2", "recommendation3"],
+    "learning_resources": {{
+        "videos": [
+            {{
+                "title": "Specific video title based on analysis",
+                "description": "Why this video is recommended",
+                "search_query": "specific search terms to find this video",
+                "category": "patterns|strengths|improvements|emotions|performance"
+            }}
+        ],
+        "books": [
+            {{
+                "title": "Specific book title based on analysis",
+                "description": "Why this book is recommended",
+                "search_query": "specific search terms to find this book",
+                "category": "patterns|strengths|improvements|emotions|performance"
+            }}
+        ]
+    }}
+}}
+
+Focus on:
+- Recurring patterns in trading behavior
+- Emotional states and their impact on trading
+- Performance trends
+- Risk management practices
+- Areas for improvement
+- Actionable recommendations
+
+For learning resources:
+- Recommend 2-3 specific YouTube videos that would help with identified issues
+- Recommend 2-3 specific books that address the user's needs
+- Make recommendations highly specific to the user's trading patterns
+- Focus on practical, actionable learning content
+- Ensure video titles and book titles are real and searchable
+"""
+
+DIGEST_SYSTEM_PROMPT = (
+    "You summarize trading journal entries for a trading coach. For each week, write at most 120 words "
+    "covering setups traded, outcomes, emotional state, mistakes and lessons. Keep ticker symbols and "
+    "concrete details; do not give advice."
+)
+
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+
+def get_insights_metrics():
+    """Counters for /api/metrics; calls_avoided is how often memoization skipped the model"""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics['calls_avoided'] = metrics['memory_hits'] + metrics['stored_hits']
+    metrics['cache'] = insights_cache.stats()
+    return metrics
+
+
+def week_start_of(day):
+    """Monday of the week containing day (matches date_bucket(..., 'week'))"""
+    return day - timedelta(days=day.weekday())
+
+
+def describe_entry(entry):
+    """One line per entry, with the linked trade if any (entry.trade should be eager-loaded)"""
+    trade_info = ""
+    if entry.trade_id and entry.trade:
+        trade = entry.trade
+        trade_info = f" (Trade: {trade.ticker_symbol}, {trade.trading_type}, {trade.win_loss})"
+    return f"Date: {entry.date}, Type: {entry.entry_type}{trade_info}\nNotes: {entry.notes[:MAX_NOTE_CHARS]}"
+
+
+def _week_activity(user_id):
+    """Entry count and newest updated_at per week, for the most recent DIGEST_WEEKS weeks with entries.
+
+    Linked trades count towards the newest updated_at, since their ticker and
+    outcome are part of the summarized text.
+    """
+    week = date_bucket(JournalEntry.date, 'week')
+    rows = db.session.query(
+        week, func.count(JournalEntry.id), func.max(JournalEntry.updated_at), func.max(Trade.updated_at)
+    )\
+        .outerjoin(Trade, JournalEntry.trade_id == Trade.id)\
+        .filter(JournalEntry.user_id == user_id)\
+        .group_by(week)\
+        .order_by(week.desc())\
+        .limit(DIGEST_WEEKS)\
+        .all()
+    return {
+        date.fromisoformat(format_bucket(week_value)): (
+            entry_count,
+            max(filter(None, (entry_updated, trade_updated)), default=None)
+        )
+        for week_value, entry_count, entry_updated, trade_updated in rows
+    }
+
+
+def _load_week_entries(user_id, weeks):
+    """Entries of the given weeks, with their trades joined in the same query, grouped by week"""
+    entries = JournalEntry.query\
+        .options(joinedload(JournalEntry.trade))\
+        .filter(
+            JournalEntry.user_id == user_id,
+            JournalEntry.date >= min(weeks),
+            JournalEntry.date <= max(weeks) + timedelta(days=6)
+        )\
+        .order_by(JournalEntry.date.asc(), JournalEntry.created_at.asc())\
+        .all()
+
+    entries_by_week = {week: [] for week in weeks}
+    for entry in entries:
+        week = week_start_of(entry.date)
+        if week in entries_by_week:
+            entries_by_week[week].append(entry)
+    return entries_by_week
+
+
+def _fallback_summary(entries):
+    """Plain excerpt used when the model leaves a week out of its response"""
+    text = " | ".join(f"{entry.date}: {entry.notes}" for entry in entries)
+    return text[:FALLBACK_SUMMARY_CHARS]
+
+
+def summarize_weeks(client, entries_by_week):
+    """Summarize several weeks of entries with one model call; returns {week_start: summary}"""
+    sections = []
+    for week, entries in sorted(entries_by_week.items()):
+        lines = "\n".join(describe_entry(entry) for entry in entries)
+        sections.append(f"Week of {week.isoformat()}:\n{lines}")
+
+    prompt = (
+        "Summarize each week below. Respond with JSON of the form "
+        '{"weeks": [{"week_start": "YYYY-MM-DD", "summary": "..."}]}.\n\n'
+        + "\n\n".join(sections)
+    )
+    _count('digest_calls')
+    response = client.chat.completions.create(
+        model=DIGEST_MODEL,
+        messages=[
+            {"role": "system", "content": DIGEST_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"}
+    )
+    content = json.loads(response.choices[0].message.content)
+
+    summaries = {}
+    for item in content.get('weeks', []):
+        try:
+            summaries[date.fromisoformat(item['week_start'])] = str(item['summary']).strip()
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    return {
+        week: summaries.get(week) or _fallback_summary(entries)
+        for week, entries in entries_by_week.items()
+    }
+
+
+def refresh_journal_digests(user_id, client):
+    """Bring the user's weekly digests up to date, summarizing only weeks whose entries changed.
+
+    A week is re-summarized when entries were added, edited or deleted, or a
+    linked trade was edited, since its digest was written (entry count or
+    newest updated_at differ). Digests are
+    committed after each batch so finished work survives a later failure.
+    Returns (digests newest first, number of weeks summarized).
+    """
+    activity = _week_activity(user_id)
+    digests = {digest.week_start: digest for digest in JournalDigest.query.filter_by(user_id=user_id)}
+
+    # Weeks whose entries were all deleted, or that fell out of the window
+    for week in [week for week in digests if week not in activity]:
+        db.session.delete(digests.pop(week))
+
+    stale = sorted(
+        week for week, (entry_count, last_updated) in activity.items()
+        if week not in digests or not digests[week].is_current(entry_count, last_updated)
+    )
+
+    for start in range(0, len(stale), DIGEST_BATCH_WEEKS):
+        batch = stale[start:start + DIGEST_BATCH_WEEKS]
+        summaries = summarize_weeks(client, _load_week_entries(user_id, batch))
+        for week in batch:
+            entry_count, last_updated = activity[week]
+            digest = digests.get(week)
+            if digest is None:
+                digest = JournalDigest(user_id=user_id, week_start=week, summary=summaries[week])
+                db.session.add(digest)
+                digests[week] = digest
+            digest.summary = summaries[week]
+            digest.entry_count = entry_count
+            digest.last_entry_updated_at = last_updated
+        db.session.commit()
+
+    db.session.commit()
+    # The commit expired every digest; reload them in one query instead of one refresh each
+    digests = JournalDigest.query\
+        .filter_by(user_id=user_id)\
+        .order_by(JournalDigest.week_start.desc())\
+        .all()
+    return digests, len(stale)
+
+
+def build_insights_prompt(digests):
+    """Insights prompt built from weekly digests (newest first)"""
+    journal_digest = "\n\n".join(
+        f"Week of {digest.week_start.isoformat()} ({digest.entry_count} entries):\n{digest.summary}"
+        for digest in digests
+    )
+    return INSIGHTS_PROMPT_TEMPLATE.format(
+        entry_count=sum(digest.entry_count for digest in digests),
+        week_count=len(digests),
+        journal_digest=journal_digest
+    )
+
+
+def _isoformat(value):
+    return value.isoformat() if value else ''
+
+
+def insights_fingerprint(user_id):
+    """Hash of everything the insights depend on: prompt version, models, and each entry's id and
+    updated_at with those of its linked trade (describe_entry puts the trade's ticker and outcome in the prompt)"""
+    digest = hashlib.sha256(f"{PROMPT_VERSION}|{INSIGHTS_MODEL}|{DIGEST_MODEL}|{DIGEST_WEEKS}".encode('utf-8'))
+    entries = db.session.query(JournalEntry.id, JournalEntry.updated_at, Trade.id, Trade.updated_at)\
+        .outerjoin(Trade, JournalEntry.trade_id == Trade.id)\
+        .filter(JournalEntry.user_id == user_id)\
+        .order_by(JournalEntry.id)\
+        .yield_per(1000)
+    for entry_id, updated_at, trade_id, trade_updated_at in entries:
+        digest.update(
+            f"\n{entry_id}|{_isoformat(updated_at)}|{trade_id or ''}|{_isoformat(trade_updated_at)}".encode('utf-8')
+        )
+    return digest.hexdigest()
+
+
+def get_memoized_insights(user_id, fingerprint):
+    """Insights previously generated for exactly this input, from the LRU or the ai_insights table"""
+    key = (user_id, fingerprint)
+    insights = insights_cache.get(key)
+    if insights is not None:
+        _count('memory_hits')
+        return insights
+
+    stored = AIInsights.query.filter_by(user_id=user_id, fingerprint=fingerprint)\
+        .order_by(AIInsights.created_at.desc())\
+        .first()
+    if stored is None:
+        return None
+
+    insights = json.loads(stored.insights_data)
+    insights_cache.set(key, insights)
+    _count('stored_hits')
+    return insights
+
+
+def generate_insights(user_id, client=None, fingerprint=None):
+    """Return insights for the user's journal, calling the model only when the journal changed.
+
+    If the input fingerprint matches stored insights those are returned as is.
+    Otherwise the journal digests are refreshed, the model is asked for
+    insights and the result is stored as an AIInsights row (the caller
+    commits). client defaults to the app's shared OpenAI client; anything
+    exposing chat.completions.create works (a stub in tests). Pass fingerprint when the
+    caller already computed insights_fingerprint(user_id). Returns (insights, memoized),
+    with insights None if the user has no journal entries.
+    """
+    fingerprint = fingerprint or insights_fingerprint(user_id)
+    insights = get_memoized_insights(user_id, fingerprint)
+    if insights is not None:
+        return insights, True
+
+    client = client or get_openai_client()
+
+    digests, weeks_summarized = refresh_journal_digests(user_id, client)
+    if not digests:
+        return None, False
+    print(f"Insights for user {user_id}: {len(digests)} weekly digests, {weeks_summarized} re-summarized")
+
+    _count('model_calls')
+    response = client.chat.completions.create(
+        model=INSIGHTS_MODEL,
+        messages=[
+            {"role": "system", "content": INSIGHTS_SYSTEM_PROMPT},
+            {"role": "user", "content": build_insights_prompt(digests)}
+        ],
+        response_format={"type": "json_object"}
+    )
+    insights = json.loads(response.choices[0].message.content)
+
+    db.session.add(AIInsights(user_id=user_id, insights_data=json.dumps(insights), fingerprint=fingerprint))
+    insights_cache.set((user_id, fingerprint), insights)
+    return insights, False
@@ -0,0 +1,82 @@
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import aliased, contains_eager
+from database import db
+from models.journal import JournalEntry
+import re
+
+# Must match the to_tsvector configuration of the journal_entries.notes_tsv column
+SEARCH_CONFIG = 'english'
+SNIPPET_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2'
+SNIPPET_RADIUS = 80
+
+
+def uses_full_text_search():
+    """Full-text search needs the notes_tsv column, which only exists on PostgreSQL"""
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def _search_vector():
+    return literal_column('journal_entries.notes_tsv')
+
+
+def _search_query(search):
+    return func.websearch_to_tsquery(SEARCH_CONFIG, search)
+
+
+def filter_by_search(query, search):
+    """Restrict a JournalEntry query to entries whose notes match search"""
+    if uses_full_text_search():
+        return query.filter(_search_vector().op('@@')(_search_query(search)))
+    return query.filter(JournalEntry.notes.ilike(f'%{search}%'))
+
+
+def fetch_search_page(query, search, offset, limit, include_trade=False):
+    """Return one page of matches as (entry, rank, snippet) tuples plus the total match count.
+
+    The count comes from COUNT(*) OVER() in the same query. On PostgreSQL
+    results are ranked with ts_rank_cd and snippets come from ts_headline,
+    computed only for the rows on the page. Elsewhere entries keep date order
+    and the snippet is cut around the first match. With include_trade the
+    linked trade is eager-loaded onto entry.trade through an outer join.
+    """
+    total = func.count().over().label('total_count')
+
+    if not uses_full_text_search():
+        if include_trade:
+            query = query.outerjoin(JournalEntry.trade).options(contains_eager(JournalEntry.trade))
+        rows = query.add_columns(total)\
+            .order_by(JournalEntry.date.desc(), JournalEntry.id.desc())\
+            .offset(offset)\
+            .limit(limit)\
+            .all()
+        results = [(row[0], None, make_snippet(row[0].notes, search)) for row in rows]
+        return results, (rows[0][1] if rows else None)
+
+    tsquery = _search_query(search)
+    rank = func.ts_rank_cd(_search_vector(), tsquery).label('rank')
+    page = query.add_columns(rank, total)\
+        .order_by(rank.desc(), JournalEntry.date.desc(), JournalEntry.id.desc())\
+        .offset(offset)\
+        .limit(limit)\
+        .subquery()
+
+    entry = aliased(JournalEntry, page)
+    snippet = func.ts_headline(SEARCH_CONFIG, page.c.notes, tsquery, SNIPPET_OPTIONS)
+    page_query = db.session.query(entry, page.c.rank, snippet, page.c.total_count)
+    if include_trade:
+        page_query = page_query.outerjoin(entry.trade).options(contains_eager(entry.trade))
+    rows = page_query.order_by(page.c.rank.desc(), page.c.date.desc(), page.c.id.desc()).all()
+    results = [(row[0], float(row[1]), row[2]) for row in rows]
+    return results, (rows[0][3] if rows else None)
+
+
+def make_snippet(notes, search):
+    """Cut a short excerpt around the first case-insensitive match, highlighted like ts_headline"""
+    match = re.search(re.escape(search), notes, re.IGNORECASE)
+    if not match:
+        return notes[:SNIPPET_RADIUS * 2]
+
+    start = max(match.start() - SNIPPET_RADIUS, 0)
+    end = min(match.end() + SNIPPET_RADIUS, len(notes))
+    excerpt = notes[start:match.start()] + '<mark>' + match.group(0) + '</mark>' + notes[match.end():end]
+    return ('...' if start > 0 else '') + excerpt + ('...' if end < len(notes) else '')
@@ -0,0 +1,124 @@
+from flask import current_app
+import os
+import threading
+import time
+
+EXTENSION_KEY = 'openai_client'
+
+_client_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+
+def init_openai_client(app, client=None):
+    """Register the app's shared OpenAI client.
+
+    Pass client to swap in a fake (anything exposing chat.completions.create).
+    Otherwise the real client is built on first use, so that forked server
+    workers each open their own connection pool. Pool and timeout settings
+    come from the OPENAI_* app config.
+    """
+    app.extensions[EXTENSION_KEY] = InstrumentedClient(client) if client is not None else None
+
+
+def get_openai_client(**options):
+    """Return the current app's shared client; options (timeout, max_retries) apply to the returned copy only.
+
+    Copies made with options share the connection pool of the app's client.
+    """
+    client = current_app.extensions.get(EXTENSION_KEY)
+    if client is None:
+        with _client_lock:
+            client = current_app.extensions.get(EXTENSION_KEY)
+            if client is None:
+                client = InstrumentedClient(_build_client(current_app.config))
+                current_app.extensions[EXTENSION_KEY] = client
+    return client.with_options(**options) if options else client
+
+
+def _build_client(config):
+    from openai import OpenAI, DefaultHttpxClient, Timeout, DEFAULT_CONNECTION_LIMITS
+
+    # The limits class comes from whichever HTTP library this openai release is built on
+    Limits = type(DEFAULT_CONNECTION_LIMITS)
+    timeout = Timeout(config.get('OPENAI_TIMEOUT', 60), connect=config.get('OPENAI_CONNECT_TIMEOUT', 5))
+    http_client = DefaultHttpxClient(
+        timeout=timeout,
+        limits=Limits(
+            max_connections=config.get('OPENAI_MAX_CONNECTIONS', 10),
+            max_keepalive_connections=config.get('OPENAI_KEEPALIVE_CONNECTIONS', 5),
+            keepalive_expiry=config.get('OPENAI_KEEPALIVE_EXPIRY', 60)
+        )
+    )
+    return OpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=config.get('OPENAI_MAX_RETRIES', 2)
+    )
+
+
+class InstrumentedClient:
+    """Wraps an OpenAI client, recording latency and token usage of chat completions per model"""
+
+    def __init__(self, client):
+        self.client = client
+        self.chat = _Chat(client.chat)
+
+    def with_options(self, **options):
+        if not hasattr(self.client, 'with_options'):
+            return self
+        return InstrumentedClient(self.client.with_options(**options))
+
+
+class _Chat:
+    def __init__(self, chat):
+        self.completions = _Completions(chat.completions)
+
+
+class _Completions:
+    def __init__(self, completions):
+        self._completions = completions
+
+    def create(self, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self._completions.create(**kwargs)
+        except Exception:
+            _record(kwargs.get('model'), time.perf_counter() - start, error=True)
+            raise
+        _record(kwargs.get('model'), time.perf_counter() - start, usage=getattr(response, 'usage', None))
+        return response
+
+
+def _record(model, elapsed, usage=None, error=False):
+    with _metrics_lock:
+        stats = _metrics.setdefault(model or 'unknown', {
+            'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+            'total_seconds': 0.0, 'max_seconds': 0.0
+        })
+        stats['requests'] += 1
+        stats['errors'] += int(error)
+        stats['total_seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+        if usage is not None:
+            stats['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+            stats['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+
+
+def get_openai_metrics():
+    """Per model request counts, latency (ms) and token usage for /api/metrics"""
+    with _metrics_lock:
+        snapshot = {model: dict(stats) for model, stats in _metrics.items()}
+
+    metrics = {}
+    for model, stats in snapshot.items():
+        metrics[model] = {
+            'requests': stats['requests'],
+            'errors': stats['errors'],
+            'prompt_tokens': stats['prompt_tokens'],
+            'completion_tokens': stats['completion_tokens'],
+            'avg_latency_ms': round(stats['total_seconds'] * 1000 / stats['requests'], 1),
+            'max_latency_ms': round(stats['max_seconds'] * 1000, 1)
+        }
+    return metrics
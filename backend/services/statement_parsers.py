@@ -0,0 +1,125 @@
+import csv
+import io
+from datetime import datetime
+
+
+class StatementParseError(Exception):
+    """Raised when a statement cannot be decoded or read as CSV"""
+
+
+def iter_csv_rows(file):
+    """Yield CSV rows from an uploaded file, reading the stream incrementally.
+    
+    Raises StatementParseError for undecodable bytes or malformed CSV, even
+    after rows have been yielded, so callers never keep part of a corrupt file.
+    """
+    stream = getattr(file, 'stream', file)
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    try:
+        yield from csv.reader(text)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise StatementParseError(f"Could not read the statement: {e}") from e
+    finally:
+        # Detach so closing the wrapper does not close the underlying upload stream
+        text.detach()
+
+
+def parse_thinkorswim_statement(file):
+    """Parse Thinkorswim statement CSV file, yielding one dict per trade row"""
+    rows = iter_csv_rows(file)
+    try:
+        # Find the start of the Account Trade History section
+        for row in rows:
+            if any("Account Trade History" in cell for cell in row):
+                break
+        else:
+            return
+        
+        # Parse trades
+        trade_headers = next(rows, None)
+        if trade_headers is None:
+            return
+        for row in rows:
+            if not any(row):
+                break  # End of section
+            # Skip empty or malformed rows
+            if len(row) < 12 or not row[2].strip():
+                continue
+            yield dict(zip(trade_headers, row))
+    finally:
+        rows.close()
+
+
+def parse_robinhood_statement(file):
+    """Parse Robinhood statement CSV file, yielding one dict per stock trade"""
+    print("Starting Robinhood CSV parsing...")
+    rows = iter_csv_rows(file)
+    trades_parsed = 0
+    try:
+        # Robinhood CSV has headers in first row
+        headers = next(rows, None)
+        if headers is None:
+            print("Robinhood CSV is empty")
+            return
+        print(f"Robinhood CSV headers: {headers}")
+        
+        for row in rows:
+            if len(row) < len(headers):
+                continue
+            
+            trade = dict(zip(headers, row))
+            
+            # Extract basic trade info using actual Robinhood column names
+            symbol = trade.get('Instrument', '').strip()
+            trans_code = trade.get('Trans Code', '').strip()
+            qty = trade.get('Quantity', '').strip()
+            price = trade.get('Price', '').strip()
+            
+            # Skip non-trade rows (dividends, fees, deposits, etc.)
+            if not symbol or not trans_code or not qty or not price:
+                continue
+                
+            # Skip options trades for now (BTO, STO, STC)
+            if trans_code in ['BTO', 'STO', 'STC']:
+                continue
+                
+            # Only process Buy/Sell stock trades
+            if trans_code in ['Buy', 'Sell']:
+                try:
+                    # Convert to proper types
+                    qty_float = abs(float(qty.replace(',', '')))
+                    price_float = float(price.replace('$', '').replace(',', ''))
+                    
+                    # Map Robinhood format to our internal format (matching what main logic expects)
+                    trade['Symbol'] = symbol
+                    trade['Side'] = trans_code.upper()
+                    trade['Qty'] = qty_float  # Changed from 'Quantity' to 'Qty'
+                    trade['Price'] = price_float
+                    trade['Transaction Type'] = 'stock'
+                    
+                    # Parse date
+                    activity_date = trade.get('Activity Date', '')
+                    if activity_date:
+                        try:
+                            # Parse MM/DD/YYYY format
+                            parsed_date = datetime.strptime(activity_date, '%m/%d/%Y')
+                            trade['Date'] = parsed_date.strftime('%m/%d/%y')
+                        except ValueError:
+                            trade['Date'] = activity_date
+                    
+                    trades_parsed += 1
+                    yield trade
+                except (ValueError, AttributeError) as e:
+                    print(f"Error processing row: {e}")
+                    continue
+    finally:
+        rows.close()
+    
+    print(f"Total stock trades parsed: {trades_parsed}")
+
+
+# Statement parsers by (lower-cased) platform name
+PARSERS = {
+    'thinkorswim': parse_thinkorswim_statement,
+    'robinhood': parse_robinhood_statement
+}
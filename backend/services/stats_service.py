@@ -0,0 +1,209 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from database import db
+from models.trade import Trade
+from models.position import Position
+from models.user_stats import UserStats, ALL_TYPES, TRADE_COUNTERS, POSITION_COUNTERS
+
+CENT = Decimal('0.01')
+
+
+def _field(source, name):
+    """Read a column value from an ORM object or a plain dict of column values"""
+    if isinstance(source, dict):
+        return source.get(name)
+    return getattr(source, name)
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(CENT)
+
+
+class StatsDelta:
+    """Accumulates changes to a user's statistics rollup.
+
+    Record a trade or position before it is modified (sign=-1) and again
+    afterwards (sign=1), then call apply() before committing so the rollup is
+    written in the same transaction as the rows it describes.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._changes = defaultdict(lambda: defaultdict(int))
+
+    def add_trade(self, trade, sign=1):
+        status = _field(trade, 'status')
+        key = (_field(trade, 'trading_type'), _field(trade, 'transaction_type') or 'stock')
+        changes = self._changes[key]
+        changes['trade_count'] += sign
+        if status == 'OPEN':
+            changes['open_count'] += sign
+        elif status == 'CLOSED':
+            changes['closed_count'] += sign
+            win_loss = _field(trade, 'win_loss')
+            if win_loss == 'Win':
+                changes['win_count'] += sign
+            elif win_loss == 'Loss':
+                changes['loss_count'] += sign
+            proceeds = _field(trade, 'proceeds')
+            cost_basis = _field(trade, 'price_cost_basis')
+            if proceeds is not None and cost_basis is not None:
+                changes['realized_pnl'] += sign * (_money(proceeds) - _money(cost_basis))
+
+    def remove_trade(self, trade):
+        self.add_trade(trade, sign=-1)
+
+    def add_position(self, position, sign=1):
+        changes = self._changes[(ALL_TYPES, ALL_TYPES)]
+        changes['position_count'] += sign
+        pnl = _field(position, 'pnl')
+        if pnl is None:
+            return
+        pnl = _money(pnl)
+        changes['position_pnl'] += sign * pnl
+        if pnl > 0:
+            changes['position_win_count'] += sign
+        elif pnl < 0:
+            changes['position_loss_count'] += sign
+        if _field(position, 'status') == 'CLOSED':
+            changes['closed_position_pnl'] += sign * pnl
+
+    def remove_position(self, position):
+        self.add_position(position, sign=-1)
+
+    def apply(self):
+        """Write the accumulated changes, one upsert per touched rollup row"""
+        for (trading_type, transaction_type), changes in self._changes.items():
+            changes = {name: value for name, value in changes.items() if value}
+            if changes:
+                _upsert_counters(self.user_id, trading_type, transaction_type, changes)
+        self._changes.clear()
+
+
+def _upsert_counters(user_id, trading_type, transaction_type, changes):
+    """Atomically add the given counter changes to a rollup row, creating it if needed"""
+    dialect = db.session.get_bind().dialect.name
+    now = datetime.utcnow()
+
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(UserStats).values(
+            user_id=user_id,
+            trading_type=trading_type,
+            transaction_type=transaction_type,
+            updated_at=now,
+            **changes
+        )
+        updates = {name: getattr(UserStats, name) + stmt.excluded[name] for name in changes}
+        updates['updated_at'] = now
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'trading_type', 'transaction_type'],
+            set_=updates
+        )
+        db.session.execute(stmt)
+        return
+
+    row = db.session.get(UserStats, (user_id, trading_type, transaction_type))
+    if row is None:
+        row = UserStats(user_id=user_id, trading_type=trading_type, transaction_type=transaction_type)
+        for name in TRADE_COUNTERS + POSITION_COUNTERS:
+            setattr(row, name, 0)
+        db.session.add(row)
+    for name, value in changes.items():
+        setattr(row, name, getattr(row, name) + value)
+    row.updated_at = now
+
+
+class UserStatsSummary:
+    """Read-side view over a user's rollup rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def trades(self, trading_type=None):
+        """Summed trade counters, optionally restricted to one trading type"""
+        totals = {name: 0 for name in TRADE_COUNTERS}
+        for row in self.rows:
+            if row.trading_type == ALL_TYPES:
+                continue
+            if trading_type and row.trading_type != trading_type:
+                continue
+            for name in TRADE_COUNTERS:
+                totals[name] += getattr(row, name)
+        totals['realized_pnl'] = float(totals['realized_pnl'])
+        return totals
+
+    def positions(self):
+        """Position counters for the user"""
+        totals = {name: 0 for name in POSITION_COUNTERS}
+        for row in self.rows:
+            if row.trading_type == ALL_TYPES:
+                for name in POSITION_COUNTERS:
+                    totals[name] += getattr(row, name)
+        totals['position_pnl'] = float(totals['position_pnl'])
+        totals['closed_position_pnl'] = float(totals['closed_position_pnl'])
+        return totals
+
+
+def get_user_stats(user_id):
+    """Load the rollup for a user - a handful of rows regardless of account size"""
+    return UserStatsSummary(UserStats.query.filter_by(user_id=user_id).all())
+
+
+def rebuild_user_stats(user_id=None):
+    """Recompute rollup rows from the trades and positions tables.
+
+    Used for backfills and repairs; rebuilds a single user when user_id is
+    given, otherwise every user. The caller is responsible for committing.
+    """
+    transaction_type = func.coalesce(Trade.transaction_type, 'stock')
+    is_closed = Trade.status == 'CLOSED'
+    trade_query = db.session.query(
+        Trade.user_id,
+        Trade.trading_type,
+        transaction_type.label('transaction_type'),
+        func.count(Trade.id).label('trade_count'),
+        func.count(Trade.id).filter(Trade.status == 'OPEN').label('open_count'),
+        func.count(Trade.id).filter(is_closed).label('closed_count'),
+        func.count(Trade.id).filter(is_closed, Trade.win_loss == 'Win').label('win_count'),
+        func.count(Trade.id).filter(is_closed, Trade.win_loss == 'Loss').label('loss_count'),
+        func.sum(Trade.proceeds - Trade.price_cost_basis).filter(is_closed).label('realized_pnl')
+    ).group_by(Trade.user_id, Trade.trading_type, transaction_type)
+
+    position_query = db.session.query(
+        Position.user_id,
+        func.count(Position.id).label('position_count'),
+        func.count(Position.id).filter(Position.pnl > 0).label('position_win_count'),
+        func.count(Position.id).filter(Position.pnl < 0).label('position_loss_count'),
+        func.sum(Position.pnl).label('position_pnl'),
+        func.sum(Position.pnl).filter(Position.status == 'CLOSED').label('closed_position_pnl')
+    ).group_by(Position.user_id)
+
+    delete_query = UserStats.query
+    if user_id:
+        trade_query = trade_query.filter(Trade.user_id == user_id)
+        position_query = position_query.filter(Position.user_id == user_id)
+        delete_query = delete_query.filter(UserStats.user_id == user_id)
+
+    now = datetime.utcnow()
+    rows = []
+    for result in trade_query:
+        row = {name: getattr(result, name) or 0 for name in TRADE_COUNTERS}
+        row.update({name: 0 for name in POSITION_COUNTERS})
+        row.update(user_id=result.user_id, trading_type=result.trading_type,
+                   transaction_type=result.transaction_type, updated_at=now)
+        rows.append(row)
+    for result in position_query:
+        row = {name: 0 for name in TRADE_COUNTERS}
+        row.update({name: getattr(result, name) or 0 for name in POSITION_COUNTERS})
+        row.update(user_id=result.user_id, trading_type=ALL_TYPES,
+                   transaction_type=ALL_TYPES, updated_at=now)
+        rows.append(row)
+
+    delete_query.delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(UserStats), rows)
+    return len(rows)
@@ -12,6 +12,10 @@ export FLASK_APP=app.py
 echo "Running database migrations..."
 flask db upgrade
 
+# Fail imports that a previous instance's workers never finished
+echo "Failing stale import jobs..."
+flask fail-stale-imports
+
 # Start the application
 echo "Starting Flask application..."
-exec python app.py 
\ No newline at end of file
+exec gunicorn -c gunicorn.conf.py app:app 
\ No newline at end of file
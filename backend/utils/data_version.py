@@ -0,0 +1,43 @@
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from database import db
+from models.user import User
+from models.trade import Trade
+from models.position import Position
+from models.journal import JournalEntry
+
+# Writes to these change what the dashboard, trade, position and journal endpoints return
+VERSIONED_MODELS = (Trade, Position, JournalEntry)
+
+users = User.__table__
+
+
+def _bump_statement(user_ids):
+    # updated_at is passed through so the bump does not count as a change to the user itself
+    return (
+        update(users)
+        .where(users.c.id.in_(user_ids))
+        .values(data_version=users.c.data_version + 1, updated_at=users.c.updated_at)
+    )
+
+
+def bump_data_version(user_id):
+    """Bump a user's data version for writes that skip the ORM flush, such as bulk inserts"""
+    db.session.execute(_bump_statement([user_id]))
+
+
+def current_data_version(user_id):
+    """The user's data version, read from the database (cached users may hold an older one)"""
+    return db.session.execute(select(users.c.data_version).where(users.c.id == user_id)).scalar()
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_flushed_users(session, flush_context):
+    """Bump the version of every user whose trades, positions or journal entries were just written"""
+    user_ids = {
+        obj.user_id for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, VERSIONED_MODELS) and obj.user_id
+    }
+    if user_ids:
+        # Same transaction as the write, so the bump commits or rolls back with it
+        session.connection().execute(_bump_statement(sorted(user_ids)))
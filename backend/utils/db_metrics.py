@@ -0,0 +1,179 @@
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from database import db
+import threading
+import time
+
+_lock = threading.Lock()
+_totals = {
+    'checkouts': 0, 'checkout_wait': 0.0, 'max_checkout_wait': 0.0, 'checkout_timeouts': 0, 'peak_checked_out': 0,
+    'requests': 0, 'queries': 0, 'query_time': 0.0, 'max_queries': 0
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised after a request when DB_QUERY_STRICT is set and the request broke its query budget or repeated a statement"""
+
+
+def query_budget(limit):
+    """Override DB_QUERY_BUDGET for one route"""
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection (including opening one)"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            _record_checkout(time.perf_counter() - start, self.checkedout(), timed_out=True)
+            raise
+        _record_checkout(time.perf_counter() - start, self.checkedout())
+        return record
+
+
+def _record_checkout(wait, checked_out, timed_out=False):
+    with _lock:
+        _totals['checkouts'] += 1
+        _totals['checkout_wait'] += wait
+        _totals['max_checkout_wait'] = max(_totals['max_checkout_wait'], wait)
+        _totals['checkout_timeouts'] += int(timed_out)
+        _totals['peak_checked_out'] = max(_totals['peak_checked_out'], checked_out)
+    stats = _request_stats()
+    if stats is not None:
+        stats['checkout_wait'] += wait
+
+
+def _request_stats():
+    if has_request_context():
+        return g.get('db_stats')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    stats = _request_stats()
+    if stats is not None:
+        stats['queries'] += 1
+        stats['query_time'] += elapsed
+        if 'statements' in stats:
+            stats['statements'][statement] += 1
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+
+
+def init_db_metrics(app):
+    """Count queries, query time and pool checkout wait per request.
+
+    Totals are reported by /api/metrics; with DB_METRICS_LOG set every
+    request also prints one line with its numbers.
+
+    For development and tests, DB_QUERY_BUDGET (statements per request) and
+    DB_REPEAT_THRESHOLD (times one identical statement may run, the usual
+    sign of an N+1 lazy load) report offending requests, and DB_QUERY_STRICT
+    turns those reports into QueryBudgetExceeded errors.
+    """
+    checks_enabled = bool(app.config.get('DB_QUERY_BUDGET') or app.config.get('DB_REPEAT_THRESHOLD'))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def start_db_stats():
+        g.db_stats = {'queries': 0, 'query_time': 0.0, 'checkout_wait': 0.0}
+        if checks_enabled:
+            g.db_stats['statements'] = Counter()
+
+    @app.after_request
+    def record_db_stats(response):
+        stats = g.pop('db_stats', None)
+        if stats is None:
+            return response
+        with _lock:
+            _totals['requests'] += 1
+            _totals['queries'] += stats['queries']
+            _totals['query_time'] += stats['query_time']
+            _totals['max_queries'] = max(_totals['max_queries'], stats['queries'])
+        if app.config.get('DB_METRICS_LOG'):
+            print(
+                f"{request.method} {request.path} {response.status_code} "
+                f"queries={stats['queries']} db={stats['query_time'] * 1000:.1f}ms "
+                f"pool_wait={stats['checkout_wait'] * 1000:.1f}ms"
+            )
+        if checks_enabled:
+            response.headers['X-Query-Count'] = str(stats['queries'])
+            _check_queries(stats)
+        return response
+
+
+def _check_queries(stats):
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', current_app.config.get('DB_QUERY_BUDGET'))
+    threshold = current_app.config.get('DB_REPEAT_THRESHOLD')
+
+    problems = []
+    if budget and stats['queries'] > budget:
+        problems.append(f"ran {stats['queries']} statements (budget {budget})")
+    if threshold:
+        for statement, count in stats['statements'].most_common():
+            if count < threshold:
+                break
+            problems.append(f"ran this statement {count} times (possible N+1): {' '.join(statement.split())[:300]}")
+
+    if not problems:
+        return
+    message = f"{request.method} {request.path} " + "; ".join(problems)
+    if current_app.config.get('DB_QUERY_STRICT'):
+        raise QueryBudgetExceeded(message)
+    print(f"Query check: {message}")
+
+
+def get_db_metrics():
+    """Pool state and per-request query/checkout numbers for /api/metrics (needs an app context)"""
+    with _lock:
+        totals = dict(_totals)
+
+    pool = db.engine.pool
+    metrics = {'pool': {'class': type(pool).__name__}}
+    if isinstance(pool, QueuePool):
+        metrics['pool'].update({
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow()
+        })
+
+    requests = totals['requests']
+    checkouts = totals['checkouts']
+    metrics.update({
+        'checkouts': checkouts,
+        'avg_checkout_wait_ms': round(totals['checkout_wait'] * 1000 / checkouts, 2) if checkouts else None,
+        'max_checkout_wait_ms': round(totals['max_checkout_wait'] * 1000, 2),
+        'checkout_timeouts': totals['checkout_timeouts'],
+        'peak_checked_out': totals['peak_checked_out'],
+        'requests': requests,
+        'avg_queries_per_request': round(totals['queries'] / requests, 2) if requests else None,
+        'max_queries_per_request': totals['max_queries'],
+        'avg_query_ms_per_request': round(totals['query_time'] * 1000 / requests, 2) if requests else None
+    })
+    return metrics
@@ -1,7 +1,14 @@
+from datetime import date
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, make_response
 from utils.auth_utils import verify_jwt_token
-from models.user import User
+from utils.user_cache import load_user
+from utils.data_version import current_data_version
+from utils.compression import strip_etag_encoding
+import hashlib
+
+# Change whenever a response format changes, so browsers drop ETags from the old format
+ETAG_FORMAT = '1'
 
 def require_auth(f):
     """Decorator to require JWT authentication"""
@@ -23,8 +30,8 @@ def require_auth(f):
         if not payload:
             return jsonify({'message': 'Invalid or expired token'}), 401
         
-        # Get user from database
-        user = User.query.get(payload['user_id'])
+        # Get user from the per-process cache, falling back to the database
+        user = load_user(payload['user_id'])
         if not user:
             return jsonify({'message': 'User not found'}), 401
         
@@ -56,7 +63,7 @@ def require_confirmed_email(f):
         if not payload:
             return jsonify({'message': 'Invalid or expired token'}), 401
         
-        user = User.query.get(payload['user_id'])
+        user = load_user(payload['user_id'])
         if not user:
             return jsonify({'message': 'User not found'}), 401
         
@@ -67,4 +74,43 @@ def require_confirmed_email(f):
         request.current_user = user
         return f(*args, **kwargs)
     
-    return decorated_function 
\ No newline at end of file
+    return decorated_function 
+def conditional_get(f):
+    """Answer GETs with a strong ETag built from the user's data version; a matching If-None-Match gets a 304.
+
+    The ETag covers the user, their data version, the full path with its query
+    string and today's date (windows like "last 30 days" move daily), so a
+    304 costs one version lookup instead of running the view. Apply below
+    require_auth.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method != 'GET' or not current_app.config.get('ETAGS_ENABLED', True):
+            return f(*args, **kwargs)
+
+        user = request.current_user
+        # Read before the view runs: a write landing meanwhile changes the version the next request sees
+        version = current_data_version(user.id)
+        key = f"{ETAG_FORMAT}|{user.id}|{version}|{date.today().isoformat()}|{request.full_path}"
+        etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+        # Compressed responses carry the ETag with an encoding suffix (utils/compression.py)
+        if_none_match = request.if_none_match
+        sent_tag = next(
+            (tag for tag in if_none_match.as_set(include_weak=True) if strip_etag_encoding(tag) == etag),
+            etag if if_none_match.star_tag else None
+        )
+        if sent_tag is not None:
+            response = current_app.response_class(status=304)
+            # The 304 repeats the ETag of the representation the client holds
+            response.set_etag(sent_tag)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response.set_etag(etag)
+        # Browsers keep the response but revalidate it on every use
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return decorated_function
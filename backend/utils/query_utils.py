@@ -0,0 +1,49 @@
+import base64
+import json
+from sqlalchemy import func, cast, Date, DateTime
+from database import db
+
+DATE_BUCKETS = ('day', 'week', 'month')
+
+
+def date_bucket(column, bucket='day'):
+    """Return a SQL expression truncating a date column to the start of its day, week or month.
+
+    Weeks start on Monday. Uses date_trunc on PostgreSQL and SQLite date
+    modifiers elsewhere, so grouped queries also run against test databases.
+    """
+    if bucket not in DATE_BUCKETS:
+        raise ValueError(f"Unsupported bucket '{bucket}'. Use one of: {', '.join(DATE_BUCKETS)}")
+    if bucket == 'day':
+        return column
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return cast(func.date_trunc(bucket, cast(column, DateTime)), Date)
+
+    if bucket == 'week':
+        return func.date(column, 'weekday 0', '-6 days')
+    return func.date(column, 'start of month')
+
+
+def format_bucket(value):
+    """Format a bucket value (date or ISO string, depending on the dialect) as YYYY-MM-DD"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    """Encode keyset pagination values (e.g. the last row's sort key) as an opaque URL-safe cursor"""
+    payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor produced by encode_cursor; raises ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
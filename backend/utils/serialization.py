@@ -0,0 +1,138 @@
+from datetime import date, datetime
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import Float, cast, func
+from models.trade import Trade
+from models.position import Position
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _as_float(column, value):
+    # Rounded to the column's scale as the Decimal it replaces would be (SQLite does not enforce it)
+    scale = getattr(column.type, 'scale', None)
+    if scale is not None:
+        value = func.round(value, scale)
+    return cast(value, Float).label(column.key)
+
+
+def _number(column):
+    """Numeric column returned as a float by the database instead of a Decimal converted per row"""
+    return _as_float(column, column)
+
+
+def _nonzero_number(column):
+    """Like _number, but zero becomes NULL, matching the `float(x) if x else None` of position dicts"""
+    return _as_float(column, func.nullif(column, 0))
+
+
+# Same keys and values as Trade.to_dict()
+TRADE_COLUMNS = (
+    Trade.id,
+    Trade.date,
+    Trade.ticker_symbol,
+    Trade.number_of_shares,
+    _number(Trade.price_cost_basis),
+    _number(Trade.proceeds),
+    _number(Trade.buy_price),
+    _number(Trade.sell_price),
+    Trade.trading_type,
+    Trade.win_loss,
+    Trade.status,
+    Trade.position_id,
+    Trade.shares_remaining,
+    Trade.transaction_type,
+    Trade.created_at,
+    Trade.updated_at
+)
+
+# Same keys and values as Position.to_dict()
+POSITION_COLUMNS = (
+    Position.id,
+    Position.user_id,
+    Position.symbol,
+    Position.status,
+    Position.total_shares,
+    _nonzero_number(Position.buy_price),
+    Position.buy_date,
+    _nonzero_number(Position.sell_price),
+    Position.sell_date,
+    _nonzero_number(Position.pnl),
+    Position.created_at,
+    Position.updated_at
+)
+
+# Positions as returned by the positions endpoints (no user_id, shares as a float)
+POSITION_SUMMARY_COLUMNS = (
+    Position.id,
+    Position.symbol,
+    Position.status,
+    _number(Position.total_shares),
+    _nonzero_number(Position.buy_price),
+    _nonzero_number(Position.sell_price),
+    Position.buy_date,
+    Position.sell_date,
+    _nonzero_number(Position.pnl),
+    Position.created_at,
+    Position.updated_at
+)
+
+
+def pick_columns(columns, fields):
+    """The columns named in fields (comma separated), in that order; all of them when fields is empty.
+
+    Raises ValueError for a name that is not one of the columns.
+    """
+    if not fields:
+        return columns
+    by_key = {column.key: column for column in columns}
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in by_key]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Use any of: {', '.join(by_key)}")
+    return tuple(by_key[name] for name in names)
+
+
+def select_rows(query, columns, columnar=False):
+    """Run query selecting only columns, skipping the ORM objects, and shape the rows with shape_rows()"""
+    return shape_rows(query.with_entities(*columns).all(), columns, columnar)
+
+
+def shape_rows(rows, columns, columnar=False):
+    """Plain dicts keyed by column name, or with columnar one list per column ({name: [values]}).
+
+    Values past len(columns), such as extra sort keys selected for a cursor, are left out.
+    """
+    keys = [column.key for column in columns]
+    if columnar:
+        if not rows:
+            return {key: [] for key in keys}
+        return {key: list(values) for key, values in zip(keys, zip(*rows))}
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """Encode payload as JSON bytes; dates and datetimes become ISO strings, Decimals floats.
+
+    Uses orjson when it is installed and the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode()
+
+
+def json_response(payload, status=200):
+    """Like jsonify(payload), status, but encoded with dumps()"""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
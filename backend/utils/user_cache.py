@@ -0,0 +1,61 @@
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from database import db
+from models.user import User
+from utils.cache import TTLCache
+
+
+# Detached User snapshots keyed by user_id; callers merge them into the request session
+user_cache = TTLCache()
+
+
+def _snapshot(user):
+    """Copy a loaded user's column values into a detached instance safe to share between requests"""
+    snapshot = User.__mapper__.class_manager.new_instance()
+    for attr in User.__mapper__.column_attrs:
+        setattr(snapshot, attr.key, getattr(user, attr.key))
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def load_user(user_id):
+    """Return the user for a verified token, from the cache when USER_CACHE_ENABLED is set"""
+    if not current_app.config.get('USER_CACHE_ENABLED', True):
+        return db.session.get(User, user_id)
+
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        # load=False attaches the snapshot to this session without a SELECT
+        return db.session.merge(cached, load=False)
+
+    version = user_cache.version()
+    user = db.session.get(User, user_id)
+    if user is not None:
+        user_cache.set(user_id, _snapshot(user), version)
+    return user
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_flushed_users(session, flush_context):
+    """Drop cached users as soon as a plan, password, confirmation or any other change is flushed"""
+    user_ids = {
+        inspect(obj).identity[0] for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User)
+    }
+    if user_ids:
+        session.info.setdefault('invalidated_user_ids', set()).update(user_ids)
+        for user_id in user_ids:
+            user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    """Invalidate again after commit in case another request cached the old row in between"""
+    for user_id in session.info.pop('invalidated_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_users(session):
+    session.info.pop('invalidated_user_ids', None)
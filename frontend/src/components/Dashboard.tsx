@@ -44,12 +44,9 @@ export default function Dashboard() {
   const loadDashboardData = async () => {
     try {
       setLoading(true);
-      const [statsResponse, chartResponse, insightsResponse] =
+      const [summaryResponse, insightsResponse] =
         await Promise.all([
-          apiClient.getDashboardStats(
-            tradingType === "all" ? undefined : tradingType
-          ),
-          apiClient.getChartData(
+          apiClient.getDashboardSummary(
             tradingType === "all" ? undefined : tradingType
           ),
           // Try to get fresh insights with learning resources, fallback to stored insights
@@ -62,12 +59,9 @@ export default function Dashboard() {
             ),
         ]);
 
-      if (statsResponse.success) {
-        setStats(statsResponse.stats);
-      }
-
-      if (chartResponse.success) {
-        setChartData(chartResponse);
+      if (summaryResponse.success) {
+        setStats(summaryResponse.stats);
+        setChartData(summaryResponse.chart);
       }
 
       if (insightsResponse.success && insightsResponse.insights) {
@@ -32,6 +32,8 @@ export default function TradeModal({
   const [uploading, setUploading] = useState(false);
   const [uploadResult, setUploadResult] = useState<any>(null);
   const [uploadError, setUploadError] = useState<string | null>(null);
+  const [uploadProgress, setUploadProgress] = useState<string | null>(null);
+  const [uploadSkipped, setUploadSkipped] = useState<string[]>([]);
   const [platform, setPlatform] = useState("thinkorswim");
   const [file, setFile] = useState<File | null>(null);
 
@@ -46,23 +48,40 @@ export default function TradeModal({
     setUploading(true);
     setUploadResult(null);
     setUploadError(null);
+    setUploadProgress(null);
+    setUploadSkipped([]);
     try {
       const formData = new FormData();
       formData.append("platform", platform);
       if (file) formData.append("file", file);
 
-      // Use the authenticated API client for the upload
-      const response = await apiClient.uploadStatement(formData);
+      // Use the authenticated API client for the upload; it waits for the background import
+      const response = await apiClient.uploadStatement(formData, (job) =>
+        setUploadProgress(
+          job.status === "queued"
+            ? "Waiting for the import to start..."
+            : `Importing... ${job.rows_processed} rows read`
+        )
+      );
 
-      // The backend returns data directly on success, no 'success' field
+      // The import summary carries trades_added; failures carry an error
       if (response && response.trades_added !== undefined) {
         setUploadResult(
           `Successfully imported ${response.trades_added} trades!`
         );
-        setTimeout(() => {
+        if (response.error_count > 0) {
+          // Leave the modal open so the skipped rows can be read
+          setUploadSkipped([
+            `Skipped ${response.error_count} rows:`,
+            ...(response.errors || []),
+          ]);
           if (onTradeCreated) onTradeCreated();
-          onClose();
-        }, 500);
+        } else {
+          setTimeout(() => {
+            if (onTradeCreated) onTradeCreated();
+            onClose();
+          }, 500);
+        }
       } else {
         setUploadError(response.error || "Upload failed");
       }
@@ -70,6 +89,7 @@ export default function TradeModal({
       setUploadError(err.message || "Upload failed");
     } finally {
       setUploading(false);
+      setUploadProgress(null);
     }
   };
 
@@ -184,18 +204,30 @@ export default function TradeModal({
                 className="btn-primary w-full"
                 disabled={uploading || !file}
               >
-                {uploading ? "Uploading..." : "Upload Statement"}
+                {uploading ? "Importing..." : "Upload Statement"}
               </button>
               {uploadError && (
                 <div className="p-3 bg-danger-50 border border-danger-200 rounded-lg text-danger-700 text-sm">
                   {uploadError}
                 </div>
               )}
+              {uploadProgress && (
+                <div className="p-3 bg-gray-50 border border-gray-200 rounded-lg text-gray-700 text-sm">
+                  {uploadProgress}
+                </div>
+              )}
               {uploadResult && (
                 <div className="p-3 bg-success-50 border border-success-200 rounded-lg text-success-700 text-sm">
                   {uploadResult}
                 </div>
               )}
+              {uploadSkipped.length > 0 && (
+                <div className="p-3 bg-yellow-50 border border-yellow-200 rounded-lg text-yellow-800 text-sm max-h-40 overflow-y-auto">
+                  {uploadSkipped.map((message, index) => (
+                    <div key={index}>{message}</div>
+                  ))}
+                </div>
+              )}
             </form>
           )}
 
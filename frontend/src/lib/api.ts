@@ -7,6 +7,14 @@ import {
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:5001";
 
+// Insights job polling: every 2 s for at most 5 minutes
+const INSIGHTS_POLL_INTERVAL_MS = 2000;
+const INSIGHTS_POLL_ATTEMPTS = 150;
+
+// Statement import job polling: every second for at most 10 minutes
+const IMPORT_POLL_INTERVAL_MS = 1000;
+const IMPORT_POLL_ATTEMPTS = 600;
+
 export class ApiClient {
   private baseUrl: string;
   private token: string | null = null;
@@ -139,6 +147,8 @@ export class ApiClient {
     status?: string;
     date_from?: string;
     date_to?: string;
+    format?: "columnar";
+    fields?: string;
   }): Promise<any> {
     const searchParams = new URLSearchParams();
     if (params) {
@@ -196,6 +206,8 @@ export class ApiClient {
   async getPositions(params?: {
     status?: string;
     symbol?: string;
+    format?: "columnar";
+    fields?: string;
   }): Promise<any> {
     const searchParams = new URLSearchParams();
     if (params) {
@@ -212,8 +224,21 @@ export class ApiClient {
     return this.request(endpoint);
   }
 
-  async getPositionDetails(positionId: string): Promise<any> {
-    return this.request(`/api/trades/positions/${positionId}`);
+  async getPositionDetails(
+    positionId: string,
+    params?: { format?: "columnar"; fields?: string }
+  ): Promise<any> {
+    const searchParams = new URLSearchParams();
+    if (params) {
+      Object.entries(params).forEach(([key, value]) => {
+        if (value) searchParams.append(key, value);
+      });
+    }
+
+    const queryString = searchParams.toString();
+    return this.request(
+      `/api/trades/positions/${positionId}${queryString ? `?${queryString}` : ""}`
+    );
   }
 
   // Journal API
@@ -273,7 +298,29 @@ export class ApiClient {
   }
 
   async getInsights(): Promise<any> {
-    return this.request("/api/journal/insights");
+    // Insights are generated in the background; poll the job until it settles,
+    // giving up after INSIGHTS_POLL_ATTEMPTS (the job keeps running server-side)
+    let response: any = await this.request("/api/journal/insights");
+
+    for (
+      let attempt = 0;
+      response.job && ["queued", "running"].includes(response.job.status);
+      attempt++
+    ) {
+      if (attempt >= INSIGHTS_POLL_ATTEMPTS) {
+        return {
+          success: false,
+          error: "Insights are taking longer than usual. Please try again in a few minutes.",
+          job: response.job,
+        };
+      }
+      await new Promise((resolve) => setTimeout(resolve, INSIGHTS_POLL_INTERVAL_MS));
+      response = await this.request(
+        `/api/journal/insights/jobs/${response.job.id}`
+      );
+    }
+
+    return response;
   }
 
   async getStoredInsights(): Promise<any> {
@@ -301,7 +348,19 @@ export class ApiClient {
     return this.request("/api/dashboard/trading-type-stats");
   }
 
-  async uploadStatement(formData: FormData): Promise<any> {
+  // Stats, chart and trading-type stats in one request
+  async getDashboardSummary(trading_type?: string): Promise<any> {
+    const endpoint = trading_type
+      ? `/api/dashboard/summary?trading_type=${trading_type}`
+      : "/api/dashboard/summary";
+
+    return this.request(endpoint);
+  }
+
+  async uploadStatement(
+    formData: FormData,
+    onProgress?: (job: any) => void
+  ): Promise<any> {
     const url = `${this.baseUrl}/api/dashboard/upload-statement`;
 
     const headers: Record<string, string> = {};
@@ -311,6 +370,9 @@ export class ApiClient {
       headers["Authorization"] = `Bearer ${this.token}`;
     }
 
+    // The statement is imported in the background; poll the job until it settles
+    formData.set("async", "true");
+
     const response = await fetch(url, {
       method: "POST",
       headers,
@@ -320,13 +382,45 @@ export class ApiClient {
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({}));
       const error = new Error(
-        errorData.message || `HTTP error! status: ${response.status}`
+        errorData.error ||
+          errorData.message ||
+          `HTTP error! status: ${response.status}`
       );
       (error as any).response = { data: errorData, status: response.status };
       throw error;
     }
 
-    return response.json();
+    let result: any = await response.json();
+
+    for (
+      let attempt = 0;
+      result.job && ["queued", "running"].includes(result.job.status);
+      attempt++
+    ) {
+      if (attempt >= IMPORT_POLL_ATTEMPTS) {
+        return {
+          success: false,
+          error: "The import is taking longer than usual. Check your trades again in a few minutes.",
+          job: result.job,
+        };
+      }
+      if (onProgress) onProgress(result.job);
+      await new Promise((resolve) => setTimeout(resolve, IMPORT_POLL_INTERVAL_MS));
+      result = await this.request(`/api/dashboard/imports/${result.job.id}`);
+    }
+
+    if (!result.job) {
+      return result;
+    }
+    if (result.job.status === "failed") {
+      return {
+        success: false,
+        error: result.job.errors[0] || "Import failed",
+        job: result.job,
+      };
+    }
+    // Completed: the import summary, as the inline import returns it
+    return { ...result.job.summary, job: result.job };
   }
 }
 